@@ -2,42 +2,176 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_ACCESS_TOKEN, CONF_IP_ADDRESS, Platform
+from homeassistant.const import CONF_SCAN_INTERVAL, Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, UPDATE_INTERVAL
-from .coordinator import InvalidAuth, PeblarCoordinator, async_validate_input
-from .peblar import Peblar
+from .balancer import PeblarLoadBalancer
+from .const import (
+    CONF_BATCH_INTERVAL,
+    CONF_BUFFER_SIZE,
+    CONF_HYSTERESIS,
+    CONF_LATENCY_BUDGET,
+    CONF_LOAD_BALANCING,
+    CONF_MAX_CURRENT,
+    CONF_MIN_CURRENT,
+    CONF_MQTT_TOPIC,
+    CONF_OPENMETRICS,
+    CONF_PHASE_CURRENTS,
+    CONF_SITE_CURRENT,
+    CONF_SURPLUS_ENTITY,
+    CONF_TELEMETRY,
+    DATA_BALANCER,
+    DATA_FLEET,
+    DATA_TELEMETRY,
+    DEFAULT_BALANCING_INTERVAL,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_LATENCY_BUDGET,
+    DEFAULT_MAX_CURRENT,
+    DEFAULT_MIN_CURRENT,
+    DEFAULT_TELEMETRY_BATCH_INTERVAL,
+    DEFAULT_TELEMETRY_BUFFER_SIZE,
+    DOMAIN,
+    ENDPOINT_METER,
+    STORAGE_VERSION,
+)
+from .coordinator import PeblarCoordinator, create_peblar
+from .fleet import PeblarFleet
+from .services import async_setup_services
+from .sessions import SessionTracker
+from .surplus import PeblarSurplusController
+from .telemetry import PeblarMetricsView, PeblarTelemetryExporter
 
 PLATFORMS = [Platform.NUMBER, Platform.SENSOR]
 
+_CURRENT = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+LOAD_BALANCING_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_SITE_CURRENT, "budget"): _CURRENT,
+            vol.Exclusive(CONF_PHASE_CURRENTS, "budget"): vol.All(
+                cv.ensure_list, [_CURRENT], vol.Length(min=3, max=3)
+            ),
+            vol.Optional(CONF_MIN_CURRENT, default=DEFAULT_MIN_CURRENT): _CURRENT,
+            vol.Optional(CONF_MAX_CURRENT, default=DEFAULT_MAX_CURRENT): _CURRENT,
+            vol.Optional(CONF_HYSTERESIS, default=DEFAULT_HYSTERESIS): _CURRENT,
+            vol.Optional(
+                CONF_SCAN_INTERVAL,
+                default=timedelta(seconds=DEFAULT_BALANCING_INTERVAL),
+            ): cv.time_period,
+            vol.Optional(
+                CONF_LATENCY_BUDGET, default=DEFAULT_LATENCY_BUDGET
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_SITE_CURRENT, CONF_PHASE_CURRENTS),
+)
+
+TELEMETRY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_OPENMETRICS, default=False): cv.boolean,
+        vol.Optional(CONF_MQTT_TOPIC): cv.string,
+        vol.Optional(
+            CONF_BATCH_INTERVAL,
+            default=timedelta(seconds=DEFAULT_TELEMETRY_BATCH_INTERVAL),
+        ): cv.time_period,
+        vol.Optional(
+            CONF_BUFFER_SIZE, default=DEFAULT_TELEMETRY_BUFFER_SIZE
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+# Chargers are set up from config entries, YAML only configures load
+# balancing and telemetry export for all chargers
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_LOAD_BALANCING): LOAD_BALANCING_SCHEMA,
+                vol.Optional(CONF_TELEMETRY): TELEMETRY_SCHEMA,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Peblar services, load balancing and telemetry export."""
+    async_setup_services(hass)
+    if (balancing := config.get(DOMAIN, {}).get(CONF_LOAD_BALANCING)) is not None:
+        balancer = hass.data[DATA_BALANCER] = PeblarLoadBalancer(hass, balancing)
+        balancer.async_start()
+    if (telemetry := config.get(DOMAIN, {}).get(CONF_TELEMETRY)) is not None:
+        exporter = hass.data[DATA_TELEMETRY] = PeblarTelemetryExporter(
+            hass, telemetry
+        )
+        exporter.async_start()
+        if telemetry[CONF_OPENMETRICS]:
+            hass.http.register_view(PeblarMetricsView(exporter))
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Peblar from a config entry."""
-    peblar = Peblar(
-        entry.data[CONF_ACCESS_TOKEN],
-        entry.data[CONF_IP_ADDRESS],
-    )
-    try:
-        await async_validate_input(hass, peblar)
-    except InvalidAuth as ex:
-        raise ConfigEntryAuthFailed from ex
+    # A dedicated session per charger keeps its connection alive between polls
+    session = async_create_clientsession(hass)
+    entry.async_on_unload(session.close)
+    peblar = create_peblar(entry.data, session)
+    entry.async_on_unload(peblar.close)
 
     peblar_coordinator = PeblarCoordinator(
         peblar,
         hass,
+        entry,
     )
-    await peblar_coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(peblar_coordinator.async_shutdown)
+    if (exporter := hass.data.get(DATA_TELEMETRY)) is not None:
+        peblar_coordinator.exporter = exporter
+        # Telemetry exports the meter, fetch it whether or not entities need it
+        entry.async_on_unload(peblar_coordinator.async_add_demand(ENDPOINT_METER))
+    # Start from the last good snapshot and revalidate it in the background,
+    # only wait for the charger when nothing was stored yet. Authentication
+    # errors surface from the first poll and start a reauth flow.
+    if await peblar_coordinator.async_restore():
+        first_poll_delay: float | None = 0
+    else:
+        await peblar_coordinator.async_config_entry_first_refresh()
+        first_poll_delay = None
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = peblar_coordinator
 
+    if (fleet := hass.data.get(DATA_FLEET)) is None:
+        fleet = hass.data[DATA_FLEET] = PeblarFleet(hass)
+    fleet.async_add(peblar_coordinator, first_poll_delay)
+    entry.async_on_unload(lambda: fleet.async_remove(peblar_coordinator))
+
+    if entry.options.get(CONF_SURPLUS_ENTITY):
+        surplus = PeblarSurplusController(hass, peblar_coordinator, entry.options)
+        surplus.async_start()
+        entry.async_on_unload(surplus.async_stop)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -45,3 +179,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted snapshot and sessions of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    await SessionTracker(hass, entry.entry_id).async_remove()
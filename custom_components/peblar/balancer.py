@@ -0,0 +1,304 @@
+"""Dynamic load balancing of Peblar chargers on a shared grid connection."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any
+
+from homeassistant.const import CONF_SCAN_INTERVAL
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    CHARGER_CP_STATE_KEY,
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CONF_HYSTERESIS,
+    CONF_LATENCY_BUDGET,
+    CONF_MAX_CURRENT,
+    CONF_MIN_CURRENT,
+    CONF_PHASE_CURRENTS,
+    CONF_SITE_CURRENT,
+    CONNECTED_CP_STATES,
+    DOMAIN,
+    PHASE_CURRENT_KEYS,
+    PHASE_IN_USE_CURRENT,
+)
+from .coordinator import ACTIVE_CP_STATES, InvalidAuth, PeblarCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+ALL_PHASES = (True, True, True)
+
+
+@dataclass(slots=True)
+class ChargerDemand:
+    """What the balancer knows about one charger in a control cycle."""
+
+    phases: tuple[bool, bool, bool]
+    connected: bool
+    charging: bool
+    # Limit of a charger that cannot be controlled, counted against the budget
+    fixed: float | None = None
+
+
+def allocate(
+    demands: Sequence[ChargerDemand],
+    phase_budget: Sequence[float],
+    min_current: float,
+    max_current: float,
+) -> list[float]:
+    """Share the phase budget between the connected chargers, in mA.
+
+    Every connected charger gets at least min_current or nothing at all,
+    charging EVs before waiting ones and earlier chargers before later ones.
+    The rest is shared max-min fair per phase (water filling) up to
+    max_current, all chargers in a single pass per cycle.
+
+    A single phase EV next to an unreachable charger that overloads the
+    other phases still gets its share of its own phase:
+
+    >>> allocate(
+    ...     [
+    ...         ChargerDemand(ALL_PHASES, False, False, fixed=16000),
+    ...         ChargerDemand((True, False, False), True, True),
+    ...     ],
+    ...     [32000, 10000, 10000],
+    ...     6000,
+    ...     16000,
+    ... )
+    [0.0, 16000.0]
+    """
+    allocations = [0.0] * len(demands)
+    remaining = list(phase_budget)
+    for demand in demands:
+        if demand.fixed is not None:
+            for phase, used in enumerate(demand.phases):
+                if used:
+                    remaining[phase] -= demand.fixed
+
+    candidates = sorted(
+        (
+            index
+            for index, demand in enumerate(demands)
+            if demand.fixed is None and demand.connected
+        ),
+        key=lambda index: not demands[index].charging,
+    )
+
+    # Pause the lowest priority chargers until every phase fits the minimum.
+    # A phase that fixed chargers overload but no candidate uses is not
+    # overloaded: pausing a candidate cannot relieve it.
+    while candidates:
+        users = _phase_users(demands, candidates)
+        overloaded = [
+            phase
+            for phase, count in enumerate(users)
+            if count and count * min_current > remaining[phase]
+        ]
+        for position in range(len(candidates) - 1, -1, -1):
+            if any(demands[candidates[position]].phases[p] for p in overloaded):
+                del candidates[position]
+                break
+        else:
+            break
+
+    unallocated = set(candidates)
+    while unallocated:
+        users = _phase_users(demands, unallocated)
+        level = max_current
+        bottlenecks: list[int] = []
+        for phase, count in enumerate(users):
+            if not count:
+                continue
+            share = remaining[phase] / count
+            if share < level:
+                level, bottlenecks = share, [phase]
+            elif share == level:
+                bottlenecks.append(phase)
+        if level == max_current:
+            fixed = set(unallocated)
+        else:
+            fixed = {
+                index
+                for index in unallocated
+                if any(demands[index].phases[p] for p in bottlenecks)
+            }
+        for index in fixed:
+            allocations[index] = float(int(level))
+            for phase, used in enumerate(demands[index].phases):
+                if used:
+                    remaining[phase] -= allocations[index]
+        unallocated -= fixed
+    return allocations
+
+
+def _phase_users(demands: Sequence[ChargerDemand], indexes: Any) -> list[int]:
+    """Return the number of chargers drawing from every phase."""
+    users = [0, 0, 0]
+    for index in indexes:
+        for phase, used in enumerate(demands[index].phases):
+            users[phase] += used
+    return users
+
+
+class PeblarLoadBalancer:
+    """Periodically divide the site capacity between all Peblar chargers.
+
+    Reads charge state and phase currents from the coordinators' last
+    snapshots, computes all allocations at once and writes only the chargers
+    whose limit has to go down or may go up by more than the hysteresis. The
+    writes of a cycle run concurrently and are abandoned after the latency
+    budget, they are retried on the next cycle. Chargers that follow the solar
+    surplus are not written, their allocation caps the surplus controller.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the balancer from its YAML configuration in A."""
+        self.hass = hass
+        if CONF_PHASE_CURRENTS in config:
+            budget = config[CONF_PHASE_CURRENTS]
+        else:
+            budget = [config[CONF_SITE_CURRENT]] * 3
+        self._phase_budget = [current * 1000 for current in budget]
+        self._min_current = config[CONF_MIN_CURRENT] * 1000
+        self._max_current = config[CONF_MAX_CURRENT] * 1000
+        self._hysteresis = config[CONF_HYSTERESIS] * 1000
+        self._interval: timedelta = config[CONF_SCAN_INTERVAL]
+        self._latency_budget: float = config[CONF_LATENCY_BUDGET]
+        # Phases an EV was last seen charging on, kept while it stays connected
+        self._phases: dict[str, tuple[bool, bool, bool]] = {}
+        self._running = False
+        self._unsub: CALLBACK_TYPE | None = None
+        self.allocations: dict[str, float] = {}
+        self.last_cycle_duration: float | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start the control loop."""
+        self._unsub = async_track_time_interval(
+            self.hass,
+            self._async_cycle,
+            self._interval,
+            name="peblar load balancing",
+            cancel_on_shutdown=True,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the control loop."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def _demand(self, entry_id: str, coordinator: PeblarCoordinator) -> ChargerDemand:
+        """Return the demand of a charger from its last snapshot."""
+        data = coordinator.data
+        if (
+            data is None
+            or not coordinator.last_update_success
+            or coordinator.write_access is False
+        ):
+            # Out of our control, assume it draws its last known limit
+            self._phases.pop(entry_id, None)
+            return ChargerDemand(
+                ALL_PHASES,
+                connected=False,
+                charging=False,
+                fixed=(
+                    self._max_current
+                    if data is None
+                    else data.get(CHARGER_MAX_CHARGING_CURRENT_KEY, self._max_current)
+                ),
+            )
+        cp_state = data.get(CHARGER_CP_STATE_KEY)
+        if cp_state not in CONNECTED_CP_STATES:
+            self._phases.pop(entry_id, None)
+            return ChargerDemand(ALL_PHASES, connected=False, charging=False)
+        charging = cp_state in ACTIVE_CP_STATES
+        if charging:
+            phases = tuple(
+                (data.get(key) or 0) > PHASE_IN_USE_CURRENT
+                for key in PHASE_CURRENT_KEYS
+            )
+            if any(phases):
+                self._phases[entry_id] = phases  # type: ignore[assignment]
+        return ChargerDemand(
+            self._phases.get(entry_id, ALL_PHASES), connected=True, charging=charging
+        )
+
+    def _needs_write(self, coordinator: PeblarCoordinator, allocation: float) -> bool:
+        """Return whether an allocation differs enough from the current limit.
+
+        Decreases are always written so the site stays within its budget.
+        """
+        current = coordinator.data.get(CHARGER_MAX_CHARGING_CURRENT_KEY)
+        return (
+            current is None
+            or allocation < current
+            or allocation - current > self._hysteresis
+        )
+
+    async def _async_cycle(self, _now: datetime | None = None) -> None:
+        """Run one control cycle."""
+        if self._running:
+            return
+        self._running = True
+        start = time.monotonic()
+        try:
+            coordinators: dict[str, PeblarCoordinator] = dict(
+                self.hass.data.get(DOMAIN, {})
+            )
+            demands = [
+                self._demand(entry_id, coordinator)
+                for entry_id, coordinator in coordinators.items()
+            ]
+            allocations = allocate(
+                demands, self._phase_budget, self._min_current, self._max_current
+            )
+            self.allocations = {}
+            writes = []
+            for (entry_id, coordinator), demand, allocation in zip(
+                coordinators.items(), demands, allocations, strict=True
+            ):
+                if demand.fixed is not None:
+                    continue
+                self.allocations[entry_id] = allocation
+                if coordinator.surplus is not None:
+                    # Surplus charging owns the limit, it stays below this
+                    coordinator.surplus.async_set_ceiling(allocation)
+                elif self._needs_write(coordinator, allocation):
+                    writes.append(self._async_write(coordinator, allocation))
+            if writes:
+                try:
+                    async with asyncio.timeout(
+                        self._latency_budget - (time.monotonic() - start)
+                    ):
+                        await asyncio.gather(*writes)
+                except TimeoutError:
+                    _LOGGER.warning(
+                        "Load balancing writes exceeded the %s s latency budget, "
+                        "retrying on the next cycle",
+                        self._latency_budget,
+                    )
+        finally:
+            self._running = False
+            self.last_cycle_duration = time.monotonic() - start
+
+    async def _async_write(
+        self, coordinator: PeblarCoordinator, allocation: float
+    ) -> None:
+        """Write an allocation to a charger and show it right away."""
+        try:
+            response = await coordinator.async_write_charging_current(allocation)
+        except (InvalidAuth, ConnectionError) as err:
+            _LOGGER.error(
+                "Error setting Peblar charging current for load balancing: %s",
+                repr(err),
+            )
+            return
+        coordinator.async_apply_write_response(allocation, response)
@@ -0,0 +1,70 @@
+"""Backoff and circuit breaker for polling an unreachable Peblar."""
+
+from __future__ import annotations
+
+from enum import StrEnum
+
+from .const import (
+    BACKOFF_MAX_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_PROBE_INTERVAL,
+)
+
+
+class BreakerState(StrEnum):
+    """State of the circuit breaker of one charger."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Track consecutive poll failures of a charger.
+
+    Every failed poll doubles the delay before the next one, up to
+    BACKOFF_MAX_DELAY. After BREAKER_FAILURE_THRESHOLD failures in a row the
+    breaker opens and the charger is only probed every BREAKER_PROBE_INTERVAL
+    seconds, a successful probe closes it again. The fleet scheduler adds
+    jitter to every delay.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a closed breaker."""
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+
+    def before_poll(self) -> bool:
+        """Mark the start of a poll, return True when the state changed."""
+        if self.state is BreakerState.OPEN:
+            self.state = BreakerState.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> bool:
+        """Close the breaker, return True when the state changed."""
+        self.failures = 0
+        changed = self.state is not BreakerState.CLOSED
+        self.state = BreakerState.CLOSED
+        return changed
+
+    def record_failure(self) -> bool:
+        """Count a failed poll, return True when the state changed."""
+        self.failures += 1
+        if (
+            self.state is BreakerState.HALF_OPEN
+            or self.failures >= BREAKER_FAILURE_THRESHOLD
+        ):
+            changed = self.state is not BreakerState.OPEN
+            self.state = BreakerState.OPEN
+            return changed
+        return False
+
+    def delay(self, poll_interval: float) -> float:
+        """Return the seconds until the next poll."""
+        if self.state is not BreakerState.CLOSED:
+            return BREAKER_PROBE_INTERVAL
+        if not self.failures:
+            return poll_interval
+        backoff = min(poll_interval * 2**self.failures, BACKOFF_MAX_DELAY)
+        return max(poll_interval, backoff)
@@ -0,0 +1,142 @@
+"""Fixed-size in-memory buffers of timestamped Peblar samples."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+import csv
+import math
+import struct
+import sys
+from typing import IO
+
+# Header of the binary export: magic, byte order, number of columns
+BINARY_MAGIC = b"PBLR"
+BINARY_HEADER = struct.Struct("<4scH")
+
+
+class SampleBuffer:
+    """Ring buffer of timestamped samples backed by a single array of doubles.
+
+    Every sample is one row of a timestamp followed by one column per field,
+    missing values are stored as NaN. Fields with labels store the index of
+    their string value and are written back as the label in CSV exports.
+    Memory is allocated once up front, when the buffer is full the oldest row
+    is overwritten.
+    """
+
+    def __init__(
+        self,
+        fields: tuple[str, ...],
+        capacity: int,
+        labels: Mapping[str, tuple[str, ...]] | None = None,
+    ) -> None:
+        """Allocate a buffer for capacity samples of fields."""
+        self.fields = fields
+        # Column of the row (after the timestamp) to its labels
+        self._labels: dict[int, tuple[str, ...]] = {}
+        self._codes: dict[int, dict[str, int]] = {}
+        for field, field_labels in (labels or {}).items():
+            column = fields.index(field) + 1
+            self._labels[column] = field_labels
+            self._codes[column] = {
+                label: code for code, label in enumerate(field_labels)
+            }
+        self._stride = len(fields) + 1
+        self._capacity = capacity
+        self._data = array("d", bytes(8 * self._stride * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return self._size
+
+    def append(self, timestamp: float, values: Iterable[float | None]) -> None:
+        """Add a sample, overwriting the oldest one when full."""
+        if self._size < self._capacity:
+            row = (self._start + self._size) % self._capacity
+            self._size += 1
+        else:
+            row = self._start
+            self._start = (self._start + 1) % self._capacity
+        offset = row * self._stride
+        data = self._data
+        data[offset] = timestamp
+        for column, value in enumerate(values, 1):
+            if value is None:
+                value = math.nan
+            elif column in self._codes:
+                value = self._codes[column].get(value, math.nan)
+            data[offset + column] = value
+
+    def _timestamp(self, index: int) -> float:
+        """Return the timestamp of the sample at a logical index."""
+        return self._data[((self._start + index) % self._capacity) * self._stride]
+
+    def window(self, start: float | None, end: float | None) -> list[bytes]:
+        """Return the raw rows with start <= timestamp <= end.
+
+        Only the rows in the window are copied, as at most two contiguous
+        segments of the underlying array.
+        """
+        indexes = range(self._size)
+        first = (
+            0 if start is None else bisect_left(indexes, start, key=self._timestamp)
+        )
+        last = (
+            self._size
+            if end is None
+            else bisect_right(indexes, end, key=self._timestamp)
+        )
+        if first >= last:
+            return []
+        view = memoryview(self._data)
+        row = (self._start + first) % self._capacity
+        count = last - first
+        head = min(count, self._capacity - row)
+        segments = [bytes(view[row * self._stride : (row + head) * self._stride])]
+        if count > head:
+            segments.append(bytes(view[: (count - head) * self._stride]))
+        return segments
+
+    def write_csv(self, segments: list[bytes], file: IO[str]) -> int:
+        """Write window segments as CSV and return the number of samples."""
+        writer = csv.writer(file)
+        writer.writerow(("timestamp", *self.fields))
+        samples = 0
+        for segment in segments:
+            rows = array("d", segment)
+            for offset in range(0, len(rows), self._stride):
+                writer.writerow(
+                    ""
+                    if math.isnan(value)
+                    else self._labels[column][int(value)]
+                    if column in self._labels
+                    else value
+                    for column, value in enumerate(
+                        rows[offset : offset + self._stride]
+                    )
+                )
+                samples += 1
+        return samples
+
+    def write_binary(self, segments: list[bytes], file: IO[bytes]) -> int:
+        """Write window segments in the compact binary format.
+
+        The header holds the magic, the byte order of the doubles ("<" or
+        ">"), the number of columns and the comma separated column names
+        prefixed by their length. The rows of doubles follow unchanged.
+        """
+        names = ",".join(("timestamp", *self.fields)).encode()
+        file.write(
+            BINARY_HEADER.pack(
+                BINARY_MAGIC, b"<" if sys.byteorder == "little" else b">", self._stride
+            )
+        )
+        file.write(struct.pack("<H", len(names)))
+        file.write(names)
+        for segment in segments:
+            file.write(segment)
+        return sum(len(segment) for segment in segments) // (8 * self._stride)
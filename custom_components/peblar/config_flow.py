@@ -3,17 +3,50 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
+import ipaddress
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import SOURCE_REAUTH, ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    SOURCE_INTEGRATION_DISCOVERY,
+    SOURCE_REAUTH,
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_ACCESS_TOKEN, CONF_IP_ADDRESS
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.selector import EntitySelector, EntitySelectorConfig
 
-from .const import DOMAIN
-from .coordinator import InvalidAuth, async_validate_input
-from .peblar import Peblar
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE_PAYLOADS,
+    CONF_CHARGERS,
+    CONF_HYSTERESIS,
+    CONF_MAX_CURRENT,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_CURRENT,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_SUBNET,
+    CONF_SURPLUS_ENTITY,
+    CONF_SURPLUS_SMOOTHING,
+    CONF_SURPLUS_WRITE_INTERVAL,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_MAX_CURRENT,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_CURRENT,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_SURPLUS_SMOOTHING,
+    DEFAULT_SURPLUS_WRITE_INTERVAL,
+    DISCOVERY_MAX_HOSTS,
+    DOMAIN,
+)
+from .coordinator import InvalidAuth, async_validate_input, create_peblar
+from .discovery import async_discover
 
 COMPONENT_DOMAIN = DOMAIN
 
@@ -24,15 +57,24 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+STEP_DISCOVERY_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_SUBNET): str,
+        vol.Required(CONF_ACCESS_TOKEN): str,
+    }
+)
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, str]:
     """Validate the user input allows to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    peblar = Peblar(data["access_token"], data["ip_address"])
-
-    await async_validate_input(hass, peblar)
+    peblar = create_peblar(data, async_get_clientsession(hass))
+    try:
+        await async_validate_input(hass, peblar)
+    finally:
+        await peblar.close()
 
     # Return info that you want to store in the config entry.
     return {"title": "peblar"}
@@ -41,19 +83,39 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 class peblarConfigFlow(ConfigFlow, domain=COMPONENT_DOMAIN):
     """Handle a config flow for peblar."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> PeblarOptionsFlow:
+        """Get the options flow for this handler."""
+        return PeblarOptionsFlow()
+
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._access_token: str | None = None
+        self._discovered: dict[str, str] = {}
+        self._unauthorized = 0
+
     async def async_step_reauth(
         self, entry_data: Mapping[str, Any]
     ) -> ConfigFlowResult:
         """Perform reauth upon an API authentication error."""
-        return await self.async_step_user()
+        return await self.async_step_manual()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        """Handle the initial step."""
+        """Let the user enter a charger or scan a subnet for chargers."""
+        return self.async_show_menu(
+            step_id="user", menu_options=["manual", "discovery"]
+        )
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle a charger entered by hand."""
         if user_input is None:
             return self.async_show_form(
-                step_id="user",
+                step_id="manual",
                 data_schema=STEP_USER_DATA_SCHEMA,
             )
 
@@ -75,7 +137,195 @@ class peblarConfigFlow(ConfigFlow, domain=COMPONENT_DOMAIN):
             errors["base"] = "invalid_auth"
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
             data_schema=STEP_USER_DATA_SCHEMA,
             errors=errors,
         )
+
+    async def async_step_discovery(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Scan a subnet for chargers that accept an access token."""
+        errors = {}
+        if user_input is not None:
+            try:
+                network = ipaddress.IPv4Network(user_input[CONF_SUBNET], strict=False)
+            except ValueError:
+                errors[CONF_SUBNET] = "invalid_subnet"
+            else:
+                if network.num_addresses > DISCOVERY_MAX_HOSTS:
+                    errors[CONF_SUBNET] = "subnet_too_large"
+                else:
+                    result = await async_discover(
+                        async_get_clientsession(self.hass),
+                        network,
+                        user_input[CONF_ACCESS_TOKEN],
+                    )
+                    configured = self._async_current_ids()
+                    self._discovered = {
+                        address: serial_number
+                        for address, serial_number in sorted(result.chargers.items())
+                        if address not in configured
+                    }
+                    self._unauthorized = len(result.unauthorized)
+                    self._access_token = user_input[CONF_ACCESS_TOKEN]
+                    if self._discovered:
+                        return await self.async_step_select()
+                    errors["base"] = "no_chargers_found"
+
+        return self.async_show_form(
+            step_id="discovery",
+            data_schema=self.add_suggested_values_to_schema(
+                STEP_DISCOVERY_DATA_SCHEMA, user_input
+            ),
+            errors=errors,
+        )
+
+    async def async_step_select(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Add the selected discovered chargers in one go."""
+        errors = {}
+        if user_input is not None:
+            if addresses := user_input[CONF_CHARGERS]:
+                first, *others = addresses
+                # Every further charger gets its own entry from a discovery flow
+                for address in others:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={"source": SOURCE_INTEGRATION_DISCOVERY},
+                            data=self._discovered_data(address),
+                        )
+                    )
+                return await self._async_create_discovered_entry(
+                    self._discovered_data(first)
+                )
+            errors["base"] = "no_chargers_selected"
+
+        return self.async_show_form(
+            step_id="select",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_CHARGERS, default=list(self._discovered)
+                    ): cv.multi_select(
+                        {
+                            address: f"{serial_number} ({address})"
+                            for address, serial_number in self._discovered.items()
+                        }
+                    )
+                }
+            ),
+            description_placeholders={
+                "found": str(len(self._discovered)),
+                "unauthorized": str(self._unauthorized),
+            },
+            errors=errors,
+        )
+
+    def _discovered_data(self, address: str) -> dict[str, Any]:
+        """Return the config entry data of a discovered charger."""
+        return {
+            CONF_IP_ADDRESS: address,
+            CONF_ACCESS_TOKEN: self._access_token,
+        }
+
+    async def async_step_integration_discovery(
+        self, discovery_info: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Add a charger the user selected in the subnet scan of another flow."""
+        return await self._async_create_discovered_entry(discovery_info)
+
+    async def _async_create_discovered_entry(
+        self, data: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Add a discovered charger unless it is configured or unreachable."""
+        await self.async_set_unique_id(data[CONF_IP_ADDRESS])
+        self._abort_if_unique_id_configured()
+        try:
+            info = await validate_input(self.hass, data)
+        except ConnectionError:
+            return self.async_abort(reason="cannot_connect")
+        except InvalidAuth:
+            return self.async_abort(reason="invalid_auth")
+        return self.async_create_entry(title=info["title"], data=data)
+
+
+class PeblarOptionsFlow(OptionsFlow):
+    """Handle Peblar options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the polling, capture and surplus charging options."""
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_MIN_POLL_INTERVAL] > user_input[CONF_MAX_POLL_INTERVAL]:
+                errors["base"] = "invalid_poll_interval"
+            elif user_input[CONF_MIN_CURRENT] > user_input[CONF_MAX_CURRENT]:
+                errors["base"] = "invalid_surplus_current"
+            else:
+                return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_ADAPTIVE_POLLING,
+                        default=options.get(CONF_ADAPTIVE_POLLING, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_MIN_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_MAX_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_CAPTURE_PAYLOADS,
+                        default=options.get(CONF_CAPTURE_PAYLOADS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SURPLUS_ENTITY,
+                        description={
+                            "suggested_value": options.get(CONF_SURPLUS_ENTITY)
+                        },
+                    ): EntitySelector(
+                        EntitySelectorConfig(domain="sensor", device_class="power")
+                    ),
+                    vol.Required(
+                        CONF_SURPLUS_SMOOTHING,
+                        default=options.get(
+                            CONF_SURPLUS_SMOOTHING, DEFAULT_SURPLUS_SMOOTHING
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_SURPLUS_WRITE_INTERVAL,
+                        default=options.get(
+                            CONF_SURPLUS_WRITE_INTERVAL, DEFAULT_SURPLUS_WRITE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_MIN_CURRENT,
+                        default=options.get(CONF_MIN_CURRENT, DEFAULT_MIN_CURRENT),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_MAX_CURRENT,
+                        default=options.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=20)),
+                    vol.Required(
+                        CONF_HYSTERESIS,
+                        default=options.get(CONF_HYSTERESIS, DEFAULT_HYSTERESIS),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                }
+            ),
+            errors=errors,
+        )
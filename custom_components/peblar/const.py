@@ -3,7 +3,152 @@
 from enum import StrEnum
 
 DOMAIN = "peblar"
-UPDATE_INTERVAL = 30
+
+ENDPOINT_SYSTEM = "system"
+ENDPOINT_METER = "meter"
+ENDPOINT_EVINTERFACE = "evinterface"
+
+CONF_SUBNET = "subnet"
+CONF_CHARGERS = "chargers"
+
+# Seconds a fetched endpoint stays fresh before the coordinator polls it again
+ENDPOINT_TTL: dict[str, float] = {
+    ENDPOINT_SYSTEM: 3600,
+    ENDPOINT_EVINTERFACE: 60,
+    ENDPOINT_METER: 20,
+}
+# Endpoints fetched whether or not an entity needs them: system names the
+# device, the charge state drives polling, sessions and load balancing
+BASE_ENDPOINTS = frozenset({ENDPOINT_SYSTEM, ENDPOINT_EVINTERFACE})
+# Endpoints only fetched while an enabled entity needs them, even on setup.
+# Their entities are created disabled from their descriptions.
+OPT_IN_ENDPOINTS: frozenset[str] = frozenset()
+
+# Seconds a single charger poll may take before it is abandoned
+POLL_DEADLINE = 10
+# Seconds to connect to a charger and between bytes of its response
+REQUEST_CONNECT_TIMEOUT = 3
+REQUEST_READ_TIMEOUT = 5
+# Failed polls back off up to this many seconds, after BREAKER_FAILURE_THRESHOLD
+# failures in a row the charger is only probed every BREAKER_PROBE_INTERVAL
+BACKOFF_MAX_DELAY = 300
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_PROBE_INTERVAL = 600
+
+# Hosts probed at once and seconds per probe when scanning a subnet
+DISCOVERY_MAX_CONCURRENT = 128
+DISCOVERY_TIMEOUT = 1.0
+DISCOVERY_MAX_HOSTS = 1024
+
+DATA_FLEET = f"{DOMAIN}_fleet"
+# Number of chargers the fleet poller polls at the same time
+FLEET_MAX_CONCURRENT_POLLS = 4
+# Relative random stretch applied to every charger's poll interval
+FLEET_POLL_JITTER = 0.1
+
+# Seconds charging current writes are coalesced before the latest is sent
+WRITE_DEBOUNCE = 1.0
+# Seconds after a write before evinterface is polled to confirm it
+WRITE_CONFIRM_DELAY = 5
+# Charging current writes a bulk service call runs at the same time
+BULK_WRITE_MAX_CONCURRENT = 10
+
+STORAGE_VERSION = 1
+# Seconds the last good snapshot is held before it is written to storage
+STORAGE_SAVE_DELAY = 60
+# Month of a charging session history kept in one storage index
+SESSION_MONTH_FORMAT = "%Y-%m"
+
+# Upper bound of samples kept by one rolling metrics window
+METRICS_MAX_SAMPLES = 900
+
+# Meter samples kept in memory per charger, two hours at one per second
+SAMPLE_BUFFER_CAPACITY = 7200
+
+# Burst sampling: bounded duration and a hard cap of two polls per second
+BURST_DEFAULT_DURATION = 60
+BURST_MAX_DURATION = 600
+BURST_DEFAULT_INTERVAL = 1.0
+BURST_MIN_INTERVAL = 0.5
+BURST_BUFFER_CAPACITY = int(BURST_MAX_DURATION / BURST_MIN_INTERVAL)
+
+# Seconds raw responses are held before they are appended to the trace, and
+# the size after which the trace is rotated
+TRACE_FLUSH_INTERVAL = 60
+TRACE_MAX_BYTES = 50 * 1024 * 1024
+
+SERVICE_EXPORT_SAMPLES = "export_samples"
+SERVICE_START_BURST = "start_burst"
+SERVICE_REPLAY_TRACE = "replay_trace"
+SERVICE_SET_CHARGING_CURRENT_BULK = "set_charging_current_bulk"
+SERVICE_GET_SESSIONS = "get_sessions"
+SERVICE_PROFILE = "profile"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+ATTR_BUFFER = "buffer"
+ATTR_DURATION = "duration"
+ATTR_INTERVAL = "interval"
+ATTR_FILENAME = "filename"
+ATTR_SPEED = "speed"
+ATTR_CHARGING_CURRENT = "charging_current"
+ATTR_CURRENTS = "currents"
+ATTR_MONTH = "month"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_BINARY = "binary"
+EXPORT_BUFFER_SAMPLES = "samples"
+EXPORT_BUFFER_BURST = "burst"
+
+# Profiling window in seconds, and lines of the profile and allocation report
+PROFILE_DEFAULT_DURATION = 60
+PROFILE_MAX_DURATION = 600
+PROFILE_STATS_LINES = 40
+# Frames kept per allocation, enough to reach integration code from json
+PROFILE_TRACEMALLOC_FRAMES = 25
+
+DATA_TELEMETRY = f"{DOMAIN}_telemetry"
+CONF_TELEMETRY = "telemetry"
+CONF_OPENMETRICS = "openmetrics"
+CONF_MQTT_TOPIC = "mqtt_topic"
+CONF_BATCH_INTERVAL = "batch_interval"
+CONF_BUFFER_SIZE = "buffer_size"
+# Seconds between MQTT batches and snapshots buffered for all chargers
+DEFAULT_TELEMETRY_BATCH_INTERVAL = 5
+DEFAULT_TELEMETRY_BUFFER_SIZE = 10000
+TELEMETRY_METRICS_URL = "/api/peblar/metrics"
+
+DATA_BALANCER = f"{DOMAIN}_balancer"
+CONF_LOAD_BALANCING = "load_balancing"
+CONF_SITE_CURRENT = "site_current"
+CONF_PHASE_CURRENTS = "phase_currents"
+CONF_MIN_CURRENT = "min_current"
+CONF_MAX_CURRENT = "max_current"
+CONF_HYSTERESIS = "hysteresis"
+CONF_LATENCY_BUDGET = "latency_budget"
+# Load balancing defaults, currents in A and times in seconds
+DEFAULT_MIN_CURRENT = 6
+DEFAULT_MAX_CURRENT = 16
+DEFAULT_HYSTERESIS = 1
+DEFAULT_BALANCING_INTERVAL = 10
+DEFAULT_LATENCY_BUDGET = 2
+
+# Solar surplus following, per charger from the options flow. Currents reuse
+# the load balancing keys and defaults.
+CONF_SURPLUS_ENTITY = "surplus_entity"
+CONF_SURPLUS_SMOOTHING = "surplus_smoothing"
+CONF_SURPLUS_WRITE_INTERVAL = "surplus_write_interval"
+DEFAULT_SURPLUS_SMOOTHING = 10
+DEFAULT_SURPLUS_WRITE_INTERVAL = 5
+# Used to turn power into current when the charger has not reported a voltage
+NOMINAL_VOLTAGE = 230
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_CAPTURE_PAYLOADS = "capture_payloads"
+CONF_MIN_POLL_INTERVAL = "min_poll_interval"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+DEFAULT_MIN_POLL_INTERVAL = 5
+DEFAULT_MAX_POLL_INTERVAL = 300
 
 
 CHARGER_CURRENT_VERSION_KEY = "firmwareversion"
@@ -28,6 +173,58 @@ CHARGER_CP_STATE_KEY = "cpstate"
 CHARGER_CP_STATE_DESCRIPTION_KEY = "chargestatedescription"
 CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY = "chargecurrentlimitsource"
 
+# Meter fields kept in the in-memory sample buffer
+SAMPLE_FIELDS: tuple[str, ...] = (
+    CHARGER_CURRENT_PHASE1_KEY,
+    CHARGER_CURRENT_PHASE2_KEY,
+    CHARGER_CURRENT_PHASE3_KEY,
+    CHARGER_VOLTAGE_PHASE1_KEY,
+    CHARGER_VOLTAGE_PHASE2_KEY,
+    CHARGER_VOLTAGE_PHASE3_KEY,
+    CHARGER_POWER_PHASE1_KEY,
+    CHARGER_POWER_PHASE2_KEY,
+    CHARGER_POWER_PHASE3_KEY,
+    CHARGER_CHARGE_POWER_KEY,
+)
+
+# Burst samples add the charge state and actual current limit to the meter
+BURST_FIELDS: tuple[str, ...] = (
+    *SAMPLE_FIELDS,
+    CHARGER_CP_STATE_KEY,
+    CHARGER_CHARGING_CURRENT_ACTUAL_KEY,
+)
+
+PHASE_CURRENT_KEYS: tuple[str, ...] = (
+    CHARGER_CURRENT_PHASE1_KEY,
+    CHARGER_CURRENT_PHASE2_KEY,
+    CHARGER_CURRENT_PHASE3_KEY,
+)
+# A phase carrying more than this (mA) while charging is in use by the EV
+PHASE_IN_USE_CURRENT = 1000
+# States in which an EV is connected and waiting for or drawing current
+CONNECTED_CP_STATES = {"State B", "State C", "State D"}
+
+# Meter snapshot fields exported as telemetry
+TELEMETRY_FIELDS: tuple[str, ...] = (
+    *SAMPLE_FIELDS,
+    CHARGER_TOTAL_ENERGY_KEY,
+    CHARGER_SESSION_ENERGY_KEY,
+)
+
+METRIC_POWER_AVERAGE_5M_KEY = "power_average_5m"
+METRIC_POWER_AVERAGE_15M_KEY = "power_average_15m"
+METRIC_ENERGY_RATE_KEY = "energy_rate"
+METRIC_PHASE_IMBALANCE_KEY = "phase_imbalance"
+
+DIAGNOSTIC_SYSTEM_LATENCY_KEY = "system_latency"
+DIAGNOSTIC_METER_LATENCY_KEY = "meter_latency"
+DIAGNOSTIC_EVINTERFACE_LATENCY_KEY = "evinterface_latency"
+DIAGNOSTIC_WRITE_LATENCY_KEY = "write_latency"
+DIAGNOSTIC_TIMEOUTS_KEY = "request_timeouts"
+DIAGNOSTIC_ERRORS_KEY = "request_errors"
+DIAGNOSTIC_RETRIES_KEY = "request_retries"
+DIAGNOSTIC_BREAKER_STATE_KEY = "breaker_state"
+
 
 class ChargerStatus(StrEnum):
     """Charger Status Description."""
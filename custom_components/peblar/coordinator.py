@@ -2,28 +2,86 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import nullcontext
+from http import HTTPStatus
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
-import requests
+import aiohttp
 
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_IP_ADDRESS
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
+    BASE_ENDPOINTS,
+    BURST_BUFFER_CAPACITY,
+    BURST_FIELDS,
+    BURST_MIN_INTERVAL,
     CHARGER_CP_STATE_DESCRIPTION_KEY,
     CHARGER_CP_STATE_KEY,
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CHARGER_PART_NUMBER_KEY,
+    CHARGER_SERIAL_NUMBER_KEY,
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE_PAYLOADS,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_POLL_INTERVAL,
+    CONNECTED_CP_STATES,
+    DATA_FLEET,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
     DOMAIN,
-    UPDATE_INTERVAL,
+    ENDPOINT_EVINTERFACE,
+    ENDPOINT_METER,
+    ENDPOINT_SYSTEM,
+    ENDPOINT_TTL,
+    OPT_IN_ENDPOINTS,
+    POLL_DEADLINE,
+    REQUEST_CONNECT_TIMEOUT,
+    REQUEST_READ_TIMEOUT,
+    SAMPLE_BUFFER_CAPACITY,
+    SAMPLE_FIELDS,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    WRITE_CONFIRM_DELAY,
+    WRITE_DEBOUNCE,
     ChargerStatus,
 )
 
-from .peblar import Peblar
+from .breaker import CircuitBreaker
+from .buffer import SampleBuffer
+from .metrics import PeblarMetrics
+from .peblar import Peblar, PeblarEndpointError, PeblarStats
+from .profiler import PeblarProfiler
+from .sessions import SessionTracker
+from .snapshot import PeblarSnapshot, decode_endpoint, decode_fields
+from .telemetry import PeblarTelemetryExporter
+from .trace import TraceWriter
+
+if TYPE_CHECKING:
+    from .surplus import PeblarSurplusController
 
 _LOGGER = logging.getLogger(__name__)
 
+# Bounded connect and read timeouts for every request to a charger
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(
+    connect=REQUEST_CONNECT_TIMEOUT, sock_read=REQUEST_READ_TIMEOUT
+)
+
+# Timer callbacks may fire slightly early, don't skip an endpoint because of it
+ENDPOINT_TTL_SLACK = 1.0
+
 CHARGER_STATUS: dict[str, ChargerStatus] = {
     "State A": "No EV connected",
     "State B": "EV connected but suspended",
@@ -35,69 +93,657 @@ CHARGER_STATUS: dict[str, ChargerStatus] = {
     "State U": "Unknown",
 }
 
+# Charge states are stored in the burst buffer as their index in this tuple
+CP_STATES: tuple[str, ...] = tuple(CHARGER_STATUS)
+
+# States in which the adaptive poller keeps polling at its minimum interval
+ACTIVE_CP_STATES = {"State C", "State D"}
 
-def _validate(peblar: Peblar) -> None:
+
+def create_peblar(
+    data: Mapping[str, Any], session: aiohttp.ClientSession
+) -> Peblar:
+    """Return the Peblar client of a config entry."""
+    return Peblar(
+        data[CONF_ACCESS_TOKEN],
+        data[CONF_IP_ADDRESS],
+        session,
+        requestGetTimeout=REQUEST_TIMEOUT,
+    )
+
+
+async def async_validate_input(hass: HomeAssistant, peblar: Peblar) -> None:
     """Authenticate using Peblar API."""
     try:
-        peblar.authenticate()
-    except requests.exceptions.HTTPError as peblar_connection_error:
-        if peblar_connection_error.response.status_code == 401:
+        await peblar.authenticate()
+    except aiohttp.ClientResponseError as peblar_connection_error:
+        if peblar_connection_error.status == HTTPStatus.UNAUTHORIZED:
             raise InvalidAuth from peblar_connection_error
         raise ConnectionError from peblar_connection_error
+    except (aiohttp.ClientError, TimeoutError) as peblar_connection_error:
+        raise ConnectionError from peblar_connection_error
 
 
-async def async_validate_input(hass: HomeAssistant, peblar: Peblar) -> None:
-    """Get new sensor data for Peblar component."""
-    await hass.async_add_executor_job(_validate, peblar)
-
+class PeblarCoordinator(DataUpdateCoordinator[PeblarSnapshot]):
+    """Peblar Coordinator class.
 
-class PeblarCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    """Peblar Coordinator class."""
+    The coordinator does not schedule its own refreshes, the shared
+    PeblarFleet polls it every poll_interval seconds.
+    """
 
-    def __init__(self, peblar: Peblar, hass: HomeAssistant) -> None:
+    def __init__(
+        self, peblar: Peblar, hass: HomeAssistant, entry: ConfigEntry
+    ) -> None:
         """Initialize."""
         self._peblar = peblar
+        self._endpoint_ttl: dict[str, float] = dict(ENDPOINT_TTL)
+        # Decoded snapshot fields of the last good response of every endpoint
+        self._endpoint_data: dict[str, dict[str, Any]] = {}
+        self._endpoint_fetched: dict[str, float] = {}
+        # Number of enabled entities that need every endpoint
+        self._endpoint_demand: Counter[str] = Counter()
+        self._adaptive_polling: bool = entry.options.get(CONF_ADAPTIVE_POLLING, False)
+        self._min_poll_interval: float = entry.options.get(
+            CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+        )
+        self._max_poll_interval: float = entry.options.get(
+            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+        )
+        # Keys whose value differs from the previous snapshot
+        self.changed_keys: set[str] = set()
+        self.device_info: DeviceInfo | None = None
+        self.metrics = PeblarMetrics()
+        self.samples = SampleBuffer(SAMPLE_FIELDS, SAMPLE_BUFFER_CAPACITY)
+        # Allocated on the first burst, most chargers never need it
+        self.burst_samples: SampleBuffer | None = None
+        self._burst_task: asyncio.Task[None] | None = None
+        self.poll_interval: float = min(ENDPOINT_TTL.values())
+        self.breaker = CircuitBreaker()
+        self.sessions = SessionTracker(hass, entry.entry_id)
+        # Only set while the profile service runs
+        self.profiler: PeblarProfiler | None = None
+        # Set when telemetry export is configured
+        self.exporter: PeblarTelemetryExporter | None = None
+        # Set while surplus charging controls the charging current
+        self.surplus: PeblarSurplusController | None = None
+        self.trace: TraceWriter | None = (
+            TraceWriter(hass.config.path(DOMAIN, f"trace-{entry.entry_id}.gz"))
+            if entry.options.get(CONF_CAPTURE_PAYLOADS, False)
+            else None
+        )
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+            update_interval=None,
         )
 
-    def authenticate(self) -> None:
-        """Authenticate using Peblar API."""
-        self._peblar.authenticate()
+        self._pending_charging_current: float | None = None
+        # Outcome of the debounced write, shared by the calls it coalesces
+        self._pending_write: asyncio.Future[None] | None = None
+        self._write_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=WRITE_DEBOUNCE,
+            immediate=False,
+            function=self._async_flush_charging_current,
+        )
+        self._unsub_confirm: CALLBACK_TYPE | None = None
 
-    def _get_data(self) -> dict[str, Any]:
-        """Get new sensor data for Peblar component."""
-        data: dict[str, Any] = self._peblar.getChargerData()
-        # Convert all keys to lowercase
-        data = {k.lower(): v for k, v in data.items()}
-        data[CHARGER_CP_STATE_DESCRIPTION_KEY] = CHARGER_STATUS.get(
-            data[CHARGER_CP_STATE_KEY.lower()], ChargerStatus.UNKNOWN
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"
+        )
+        self._save_pending = False
+        # None until a write has either succeeded or been refused
+        self.write_access: bool | None = None
+
+    async def async_restore(self) -> bool:
+        """Restore the last good snapshot from storage.
+
+        Returns False when there is nothing to restore and the coordinator
+        needs a live refresh before entities can be created.
+        """
+        await self.sessions.async_load()
+        if not (stored := await self._store.async_load()):
+            return False
+        self.write_access = stored.get("write_access")
+        if not (endpoints := stored.get("endpoints")):
+            return False
+        # Restored endpoints have no fetch time, the next poll fetches them all
+        self._endpoint_data = {
+            endpoint: decode_fields(payload) for endpoint, payload in endpoints.items()
+        }
+        self._update_device_info()
+        data = self._snapshot()
+        self.changed_keys = data.diff(None)
+        self.async_set_updated_data(data)
+        return True
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        self._save_pending = False
+        return {"endpoints": self._endpoint_data, "write_access": self.write_access}
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save STORAGE_SAVE_DELAY seconds after the first unsaved change.
+
+        Store restarts its delay on every call, polls that come more often
+        than the delay would otherwise postpone the save forever.
+        """
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _async_set_write_access(self, write_access: bool) -> None:
+        """Remember whether the access token may change settings."""
+        if self.write_access == write_access:
+            return
+        self.write_access = write_access
+        self._async_schedule_save()
+        self.async_update_listeners()
+
+    @property
+    def stats(self) -> PeblarStats:
+        """Return the request statistics of the Peblar client."""
+        return self._peblar.stats
+
+    def _get_data(self, raw: dict[str, bytes]) -> PeblarSnapshot:
+        """Get new sensor data for Peblar component.
+
+        Decodes the fetched endpoint bodies into the endpoint cache and
+        returns the merged snapshot of all cached endpoints.
+        """
+        profiler = self.profiler
+        with nullcontext() if profiler is None else profiler.profile("decode"):
+            for endpoint, body in raw.items():
+                self._endpoint_data[endpoint] = decode_endpoint(body)
+            if ENDPOINT_SYSTEM in raw:
+                self._update_device_info()
+            return self._snapshot()
+
+    def _snapshot(self) -> PeblarSnapshot:
+        """Merge the cached endpoints into a snapshot."""
+        data = PeblarSnapshot(*self._endpoint_data.values())
+        setattr(
+            data,
+            CHARGER_CP_STATE_DESCRIPTION_KEY,
+            CHARGER_STATUS.get(data.get(CHARGER_CP_STATE_KEY), ChargerStatus.UNKNOWN),
+        )
+        return data
+
+    def _update_device_info(self) -> None:
+        """Build the device info once from the system endpoint."""
+        system = self._endpoint_data.get(ENDPOINT_SYSTEM, {})
+        serial_number = system.get(CHARGER_SERIAL_NUMBER_KEY)
+        part_number = system.get(CHARGER_PART_NUMBER_KEY)
+        if self.device_info is not None and (
+            self.device_info["identifiers"] == {(DOMAIN, serial_number)}
+            and self.device_info["model_id"] == part_number
+        ):
+            return
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, serial_number)},
+            name="Peblar",
+            manufacturer="Peblar",
+            model_id=part_number,
+        )
+
+    @callback
+    def async_add_demand(self, endpoint: str) -> CALLBACK_TYPE:
+        """Fetch an endpoint while an entity needs it, return the remover."""
+        self._endpoint_demand[endpoint] += 1
+
+        @callback
+        def remove_demand() -> None:
+            self._endpoint_demand[endpoint] -= 1
+            if self._endpoint_demand[endpoint] <= 0:
+                del self._endpoint_demand[endpoint]
+
+        return remove_demand
+
+    def _needed(self, endpoint: str) -> bool:
+        """Return whether an endpoint has to be fetched at all.
+
+        Every endpoint except the opt-in ones is fetched once so the
+        platforms know which entities exist. After that only the base
+        endpoints and the endpoints of enabled entities are fetched, and the
+        meter while an EV is connected for sessions and load balancing.
+        """
+        if endpoint in BASE_ENDPOINTS or self._endpoint_demand[endpoint]:
+            return True
+        if endpoint == ENDPOINT_METER and (
+            self.data is not None
+            and self.data.get(CHARGER_CP_STATE_KEY) in CONNECTED_CP_STATES
+        ):
+            return True
+        return endpoint not in OPT_IN_ENDPOINTS and endpoint not in self._endpoint_data
+
+    def _due_endpoints(self, now: float) -> list[str]:
+        """Return the needed endpoints whose cached payload has expired."""
+        return [
+            endpoint
+            for endpoint, ttl in self._endpoint_ttl.items()
+            if self._needed(endpoint)
+            and (
+                endpoint not in self._endpoint_fetched
+                or now - self._endpoint_fetched[endpoint] >= ttl - ENDPOINT_TTL_SLACK
+            )
+        ]
+
+    def seconds_until_due(self) -> float:
+        """Return the seconds until a needed endpoint expires, 0 when one has."""
+        now = time.monotonic()
+        delay: float | None = None
+        for endpoint, ttl in self._endpoint_ttl.items():
+            if not self._needed(endpoint):
+                continue
+            if (fetched := self._endpoint_fetched.get(endpoint)) is None:
+                return 0
+            expires = fetched + ttl - ENDPOINT_TTL_SLACK - now
+            if delay is None or expires < delay:
+                delay = expires
+        return max(delay or 0, 0)
+
+    def async_expire_endpoint(self, endpoint: str) -> None:
+        """Force an endpoint to be fetched on the next update."""
+        self._endpoint_fetched.pop(endpoint, None)
+
+    def _adapt_poll_interval(self, data: PeblarSnapshot) -> None:
+        """Poll fast while charging or changing state, back off when idle.
+
+        The adaptive interval replaces the TTL of the meter and evinterface
+        endpoints, the system endpoint keeps its own schedule.
+        """
+        cp_state = data.get(CHARGER_CP_STATE_KEY)
+        previous_cp_state = self.data.get(CHARGER_CP_STATE_KEY) if self.data else None
+        if cp_state in ACTIVE_CP_STATES or cp_state != previous_cp_state:
+            interval = self._min_poll_interval
+        else:
+            interval = min(
+                self._endpoint_ttl[ENDPOINT_METER] * 2, self._max_poll_interval
+            )
+        self._endpoint_ttl[ENDPOINT_METER] = interval
+        self._endpoint_ttl[ENDPOINT_EVINTERFACE] = interval
+        self.poll_interval = interval
+
+    @property
+    def next_poll_delay(self) -> float:
+        """Return the seconds until the next poll, backing off on failures.
+
+        Only needed endpoints count, without meter entities and no EV
+        connected the charger is polled at the evinterface interval.
+        """
+        interval = min(
+            (
+                ttl
+                for endpoint, ttl in self._endpoint_ttl.items()
+                if self._needed(endpoint)
+            ),
+            default=self.poll_interval,
         )
+        return self.breaker.delay(interval)
+
+    async def _async_update_data(self) -> PeblarSnapshot:
+        """Poll the charger and feed the result to the circuit breaker."""
+        if self.breaker.before_poll():
+            self.async_update_listeners()
+        try:
+            if (profiler := self.profiler) is None:
+                data = await self._async_poll()
+            else:
+                with profiler.timed("update"):
+                    data = await self._async_poll()
+        except (UpdateFailed, ConfigEntryAuthFailed):
+            if self.breaker.record_failure():
+                _LOGGER.warning(
+                    "Peblar %s is not responding, probing it every %s seconds",
+                    self._peblar.address,
+                    self.next_poll_delay,
+                )
+                # Listeners are not called for consecutive failures
+                self.async_update_listeners()
+            raise
+        if self.breaker.record_success():
+            _LOGGER.info("Peblar %s is responding again", self._peblar.address)
         return data
 
-    async def _async_update_data(self) -> dict[str, Any]:
+    async def _async_poll(self) -> PeblarSnapshot:
         """Get new sensor data for Peblar component."""
-        return await self.hass.async_add_executor_job(self._get_data)
+        now = time.monotonic()
+        if not (endpoints := self._due_endpoints(now)) and self.data is not None:
+            # Nothing has expired since the last poll, keep the snapshot
+            self.changed_keys = set()
+            return self.data
+        try:
+            async with asyncio.timeout(POLL_DEADLINE):
+                results = await self._peblar.getEndpoints(endpoints)
+        except PeblarEndpointError as peblar_connection_error:
+            errors = peblar_connection_error.errors
+            if any(
+                isinstance(err, aiohttp.ClientResponseError)
+                and err.status == HTTPStatus.UNAUTHORIZED
+                for err in errors.values()
+            ):
+                raise ConfigEntryAuthFailed from peblar_connection_error
+            results = peblar_connection_error.results
+            if not results or any(
+                endpoint not in self._endpoint_data for endpoint in errors
+            ):
+                raise UpdateFailed(
+                    "Error fetching Peblar endpoint(s) "
+                    f"{', '.join(errors)}: {peblar_connection_error}"
+                ) from peblar_connection_error
+            _LOGGER.warning(
+                "Using cached data for Peblar endpoint(s) %s: %s",
+                ", ".join(errors),
+                peblar_connection_error,
+            )
+        except TimeoutError as peblar_connection_error:
+            self.stats.timeouts += 1
+            raise UpdateFailed(
+                f"Timeout polling Peblar after {POLL_DEADLINE} seconds"
+            ) from peblar_connection_error
+        except aiohttp.ClientError as peblar_connection_error:
+            raise UpdateFailed(
+                f"Error communicating with Peblar: {peblar_connection_error}"
+            ) from peblar_connection_error
+        self.stats.record("poll", time.monotonic() - now)
+        if self.trace is not None:
+            await self._async_trace(results)
+
+        try:
+            data = self._get_data(results)
+        except ValueError as err:
+            raise UpdateFailed(f"Invalid response from Peblar: {err}") from err
+        for endpoint in results:
+            self._endpoint_fetched[endpoint] = now
+        self._async_schedule_save()
+
+        if ENDPOINT_METER in results:
+            timestamp = time.time()
+            self.metrics.update(data, now)
+            self.samples.append(timestamp, map(data.get, SAMPLE_FIELDS))
+            if self.exporter is not None:
+                self.exporter.async_record(
+                    data[CHARGER_SERIAL_NUMBER_KEY], timestamp, data
+                )
+        if ENDPOINT_METER in results or ENDPOINT_EVINTERFACE in results:
+            self.sessions.async_update(data, time.time())
+        if self._adaptive_polling:
+            self._adapt_poll_interval(data)
+        self.changed_keys = data.diff(self.data)
+        return data
+
+    @property
+    def burst_active(self) -> bool:
+        """Return whether a burst capture is running."""
+        return self._burst_task is not None and not self._burst_task.done()
+
+    @callback
+    def async_start_burst(self, duration: float, interval: float) -> None:
+        """Sample meter and evinterface every interval seconds for duration.
+
+        The burst runs next to the regular polls and only fills burst_samples,
+        entity state and the poll interval are left alone. A running burst is
+        replaced by the new one.
+        """
+        self.async_stop_burst()
+        if self.burst_samples is None:
+            self.burst_samples = SampleBuffer(
+                BURST_FIELDS,
+                BURST_BUFFER_CAPACITY,
+                labels={CHARGER_CP_STATE_KEY: CP_STATES},
+            )
+        self._burst_task = self.hass.async_create_background_task(
+            self._async_burst(duration, max(interval, BURST_MIN_INTERVAL)),
+            f"{DOMAIN} burst",
+        )
+
+    @callback
+    def async_stop_burst(self) -> None:
+        """Cancel a running burst capture."""
+        if self._burst_task is not None:
+            self._burst_task.cancel()
+            self._burst_task = None
+
+    async def _async_burst(self, duration: float, interval: float) -> None:
+        """Poll the fast-changing endpoints at a fixed rate until duration ends."""
+        assert self.burst_samples is not None
+        endpoints = (ENDPOINT_METER, ENDPOINT_EVINTERFACE)
+        start = time.monotonic()
+        next_poll = start
+        _LOGGER.debug("Starting %s s Peblar burst every %s s", duration, interval)
+        while next_poll < start + duration:
+            try:
+                async with asyncio.timeout(min(interval * 2, POLL_DEADLINE)):
+                    results = await self._peblar.getEndpoints(endpoints)
+            except (aiohttp.ClientError, TimeoutError) as err:
+                _LOGGER.debug("Peblar burst poll failed: %s", repr(err))
+            else:
+                if self.trace is not None:
+                    await self._async_trace(results)
+                try:
+                    fields = {
+                        field: value
+                        for body in results.values()
+                        for field, value in decode_endpoint(body).items()
+                    }
+                except ValueError as err:
+                    _LOGGER.debug("Invalid Peblar burst response: %s", err)
+                else:
+                    timestamp = time.time()
+                    self.burst_samples.append(
+                        timestamp, map(fields.get, BURST_FIELDS)
+                    )
+                    if self.exporter is not None:
+                        self.exporter.async_record(
+                            self.data[CHARGER_SERIAL_NUMBER_KEY], timestamp, fields
+                        )
+            # Never start two polls less than interval apart, even after a
+            # slow poll, that is the hard cap on the request rate
+            next_poll = max(next_poll + interval, time.monotonic())
+            await asyncio.sleep(next_poll - time.monotonic())
+        _LOGGER.debug("Peblar burst finished")
+
+    async def _async_trace(self, results: dict[str, bytes]) -> None:
+        """Add raw responses to the trace and write it out periodically."""
+        assert self.trace is not None
+        timestamp = time.time()
+        for endpoint, body in results.items():
+            self.trace.record(timestamp, endpoint, body)
+        if self.trace.due(now := time.monotonic()):
+            await self.hass.async_add_executor_job(
+                self.trace.write, self.trace.take(now)
+            )
+
+    async def async_replay(
+        self, records: list[tuple[float, str, bytes]], speed: float
+    ) -> None:
+        """Feed traced responses through the decode path and the entities.
 
-    def _set_charging_current(self, charging_current: float) -> None:
-        """Set maximum charging current for Peblar."""
+        Records are replayed speed times faster than they were captured, or
+        back to back when speed is 0. The caller stops polling meanwhile.
+        """
+        previous: float | None = None
+        for timestamp, endpoint, body in records:
+            if speed and previous is not None:
+                await asyncio.sleep(max(timestamp - previous, 0) / speed)
+            else:
+                await asyncio.sleep(0)
+            previous = timestamp
+            try:
+                data = self._get_data({endpoint: body})
+            except ValueError as err:
+                _LOGGER.warning("Invalid traced %s response: %s", endpoint, err)
+                continue
+            self.changed_keys = data.diff(self.data)
+            self.async_set_updated_data(data)
+        # Fetch everything again once live polling resumes
+        for endpoint in self._endpoint_ttl:
+            self.async_expire_endpoint(endpoint)
+
+    async def async_write_charging_current(
+        self, charging_current: float
+    ) -> dict[str, Any]:
+        """Send a charging current to the Peblar right away."""
         try:
-            self._peblar.setMaxChargingCurrent(charging_current)
-        except requests.exceptions.HTTPError as peblar_connection_error:
-            if peblar_connection_error.response.status_code == 403:
+            response = await self._peblar.setMaxChargingCurrent(charging_current)
+        except aiohttp.ClientResponseError as peblar_connection_error:
+            if peblar_connection_error.status == HTTPStatus.FORBIDDEN:
+                self._async_set_write_access(False)
                 raise InvalidAuth from peblar_connection_error
-            raise
+            raise ConnectionError from peblar_connection_error
+        except (aiohttp.ClientError, TimeoutError) as peblar_connection_error:
+            raise ConnectionError from peblar_connection_error
+        self._async_set_write_access(True)
+        return response
 
     async def async_set_charging_current(self, charging_current: float) -> None:
-        """Set maximum charging current for Peblar."""
-        await self.hass.async_add_executor_job(
-            self._set_charging_current, charging_current
+        """Set maximum charging current for Peblar.
+
+        The new value is shown immediately, writes within WRITE_DEBOUNCE
+        seconds are coalesced into the latest value and a value equal to the
+        current limit is not written at all. Returns once the coalesced value
+        is written, raises HomeAssistantError when the write failed.
+        """
+        if self.data.get(CHARGER_MAX_CHARGING_CURRENT_KEY) == charging_current:
+            return
+        self._pending_charging_current = charging_current
+        if self._pending_write is None:
+            self._pending_write = self.hass.loop.create_future()
+        pending_write = self._pending_write
+        self.async_apply_charging_current(charging_current)
+        await self._write_debouncer.async_call()
+        await pending_write
+
+    @callback
+    def async_apply_charging_current(self, charging_current: float) -> None:
+        """Update the snapshot with a charging current without polling."""
+        self._endpoint_data.setdefault(ENDPOINT_EVINTERFACE, {})[
+            CHARGER_MAX_CHARGING_CURRENT_KEY
+        ] = charging_current
+        data = self._snapshot()
+        self.changed_keys = data.diff(self.data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def async_apply_write_response(
+        self, charging_current: float, response: Any
+    ) -> float:
+        """Show the charging current confirmed by a write and return it."""
+        confirmed = (
+            decode_fields(response).get(CHARGER_MAX_CHARGING_CURRENT_KEY)
+            if isinstance(response, dict)
+            else None
         )
-        await self.async_request_refresh()
+        if confirmed is None:
+            confirmed = charging_current
+        if confirmed != self.data.get(CHARGER_MAX_CHARGING_CURRENT_KEY):
+            self.async_apply_charging_current(confirmed)
+        return confirmed
+
+    async def _async_flush_charging_current(self) -> None:
+        """Write the latest requested charging current."""
+        if (charging_current := self._pending_charging_current) is None:
+            return
+        pending_write = self._pending_write
+        self._pending_charging_current = None
+        self._pending_write = None
+        try:
+            response = await self.async_write_charging_current(charging_current)
+        except (InvalidAuth, ConnectionError) as err:
+            # Poll the limit the charger really has instead of the shown one
+            self.async_confirm_write()
+            if pending_write is not None:
+                pending_write.set_exception(self._write_error(err))
+            return
+        self.async_apply_write_response(charging_current, response)
+        if pending_write is not None:
+            pending_write.set_result(None)
+        if self._unsub_confirm is not None:
+            self._unsub_confirm()
+        self._unsub_confirm = async_call_later(
+            self.hass, WRITE_CONFIRM_DELAY, self.async_confirm_write
+        )
+
+    @callback
+    def async_cancel_pending_write(self) -> None:
+        """Drop a debounced write that a direct write replaces."""
+        self._write_debouncer.async_cancel()
+        self._pending_charging_current = None
+        if self._pending_write is not None:
+            self._pending_write.set_exception(
+                HomeAssistantError(
+                    translation_domain=DOMAIN,
+                    translation_key="write_superseded",
+                    translation_placeholders={"address": self._peblar.address},
+                )
+            )
+            self._pending_write = None
+
+    def _write_error(self, err: Exception) -> HomeAssistantError:
+        """Return the error raised to the callers of a failed write."""
+        if isinstance(err, InvalidAuth):
+            error = HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="write_refused",
+                translation_placeholders={"address": self._peblar.address},
+            )
+        else:
+            error = HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="write_failed",
+                translation_placeholders={
+                    "address": self._peblar.address,
+                    "error": repr(err.__cause__ or err),
+                },
+            )
+        error.__cause__ = err
+        return error
+
+    @callback
+    def async_confirm_write(self, _now: Any = None) -> None:
+        """Poll evinterface to confirm the written charging current.
+
+        The poll goes through the fleet, so confirmations share its limit on
+        concurrent polls.
+        """
+        self._unsub_confirm = None
+        self.async_expire_endpoint(ENDPOINT_EVINTERFACE)
+        if (fleet := self.hass.data.get(DATA_FLEET)) is not None:
+            fleet.async_poll_soon(self)
+        else:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_shutdown(self) -> None:
+        """Cancel pending writes, confirmations and bursts, flush the trace.
+
+        A pending save of the snapshot and the session history are written
+        right away, so no delayed save outlives the config entry.
+        """
+        await super().async_shutdown()
+        self.async_stop_burst()
+        self._write_debouncer.async_shutdown()
+        if self._pending_write is not None:
+            self._pending_write.set_exception(
+                self._write_error(ConnectionError("Peblar was unloaded"))
+            )
+            self._pending_write = None
+            self._pending_charging_current = None
+        if self._unsub_confirm is not None:
+            self._unsub_confirm()
+            self._unsub_confirm = None
+        if self.trace is not None:
+            await self.hass.async_add_executor_job(
+                self.trace.write, self.trace.take()
+            )
+        if self._save_pending:
+            await self._store.async_save(self._data_to_store())
+        await self.sessions.async_save()
 
 
 class InvalidAuth(HomeAssistantError):
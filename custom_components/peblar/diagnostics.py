@@ -0,0 +1,42 @@
+"""Diagnostics support for the peblar integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.core import HomeAssistant
+
+from .balancer import PeblarLoadBalancer
+from .const import DATA_BALANCER, DOMAIN
+from .coordinator import PeblarCoordinator
+
+TO_REDACT = {CONF_ACCESS_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: PeblarCoordinator = hass.data[DOMAIN][entry.entry_id]
+    balancer: PeblarLoadBalancer | None = hass.data.get(DATA_BALANCER)
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "poll_interval": coordinator.poll_interval,
+        "last_update_success": coordinator.last_update_success,
+        "breaker": {
+            "state": coordinator.breaker.state,
+            "failures": coordinator.breaker.failures,
+        },
+        "stats": coordinator.stats.as_dict(),
+        "data": coordinator.data.as_dict(),
+        "load_balancing": None
+        if balancer is None
+        else {
+            "allocation": balancer.allocations.get(entry.entry_id),
+            "last_cycle_duration": balancer.last_cycle_duration,
+        },
+    }
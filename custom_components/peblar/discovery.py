@@ -0,0 +1,81 @@
+"""Concurrent discovery of Peblar chargers on a subnet."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from http import HTTPStatus
+import ipaddress
+
+import aiohttp
+
+from .const import (
+    CHARGER_SERIAL_NUMBER_KEY,
+    DISCOVERY_MAX_CONCURRENT,
+    DISCOVERY_TIMEOUT,
+    ENDPOINT_SYSTEM,
+)
+from .peblar import Peblar, PeblarEndpointError
+from .snapshot import decode_endpoint
+
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=DISCOVERY_TIMEOUT)
+
+
+@dataclass
+class DiscoveryResult:
+    """Chargers found on a subnet."""
+
+    # Address to serial number of the chargers that accepted the token
+    chargers: dict[str, str] = field(default_factory=dict)
+    # Addresses of chargers that refused the token
+    unauthorized: list[str] = field(default_factory=list)
+
+
+async def async_discover(
+    session: aiohttp.ClientSession, network: ipaddress.IPv4Network, token: str
+) -> DiscoveryResult:
+    """Probe the system endpoint of every host of a network.
+
+    Every host is first asked for the system endpoint without credentials.
+    Only hosts that answer it with 401, like the Peblar API does, are asked
+    again with the token, so the token is not sent to other devices on the
+    subnet. At most DISCOVERY_MAX_CONCURRENT hosts are probed at once, each
+    with a DISCOVERY_TIMEOUT second timeout, so a /24 takes a few seconds even
+    when most addresses do not answer.
+    """
+    result = DiscoveryResult()
+    semaphore = asyncio.Semaphore(DISCOVERY_MAX_CONCURRENT)
+
+    async def probe(address: str) -> None:
+        peblar = Peblar(token, address, session, requestGetTimeout=PROBE_TIMEOUT)
+        async with semaphore:
+            try:
+                async with session.get(
+                    f"{peblar.baseUrl}{ENDPOINT_SYSTEM}", timeout=PROBE_TIMEOUT
+                ) as response:
+                    if response.status != HTTPStatus.UNAUTHORIZED:
+                        return
+            except (aiohttp.ClientError, TimeoutError):
+                return
+            try:
+                results = await peblar.getEndpoints((ENDPOINT_SYSTEM,))
+            except PeblarEndpointError as err:
+                # A 401 on the Peblar API path is a charger with another token
+                error = err.errors[ENDPOINT_SYSTEM]
+                if (
+                    isinstance(error, aiohttp.ClientResponseError)
+                    and error.status == HTTPStatus.UNAUTHORIZED
+                ):
+                    result.unauthorized.append(address)
+                return
+        try:
+            serial_number = decode_endpoint(results[ENDPOINT_SYSTEM]).get(
+                CHARGER_SERIAL_NUMBER_KEY
+            )
+        except ValueError:
+            return
+        if serial_number:
+            result.chargers[address] = serial_number
+
+    await asyncio.gather(*(probe(str(host)) for host in network.hosts()))
+    return result
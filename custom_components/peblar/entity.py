@@ -2,29 +2,61 @@
 
 from __future__ import annotations
 
-from homeassistant.helpers.device_registry import DeviceInfo
+from collections.abc import Iterable
+from typing import Any
+
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import CHARGER_PART_NUMBER_KEY, CHARGER_SERIAL_NUMBER_KEY, DOMAIN
 from .coordinator import PeblarCoordinator
 
+# Endpoint of every entity key, generated from the entity descriptions of the
+# platforms. Keys without an endpoint are computed by the integration.
+FIELD_ENDPOINTS: dict[str, str] = {}
+
+
+def register_fields(descriptions: Iterable[Any]) -> None:
+    """Add the endpoints of entity descriptions to FIELD_ENDPOINTS."""
+    for description in descriptions:
+        if description.endpoint is not None:
+            FIELD_ENDPOINTS[description.key] = description.endpoint
+
 
 class PeblarEntity(CoordinatorEntity[PeblarCoordinator]):
     """Defines a base Peblar entity."""
 
     _attr_has_entity_name = True
+    _written_available: bool | None = None
+
+    def __init__(self, coordinator: PeblarCoordinator) -> None:
+        """Initialize a Peblar entity."""
+        super().__init__(coordinator)
+        self._attr_device_info = coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Fetch the endpoint of the entity while it is enabled."""
+        await super().async_added_to_hass()
+        if (endpoint := FIELD_ENDPOINTS.get(self.entity_description.key)) is not None:
+            self.async_on_remove(self.coordinator.async_add_demand(endpoint))
+
+    def _should_write(self) -> bool:
+        """Return whether the value backing this entity changed."""
+        return self.entity_description.key in self.coordinator.changed_keys
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when availability or the backing value changed."""
+        if (profiler := self.coordinator.profiler) is not None:
+            with profiler.profile("entity_write"):
+                self._async_write_changed_state()
+        else:
+            self._async_write_changed_state()
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information about this Peblar device."""
-        return DeviceInfo(
-            identifiers={
-                (
-                    DOMAIN,
-                    self.coordinator.data[CHARGER_SERIAL_NUMBER_KEY],
-                )
-            },
-            name="Peblar",
-            manufacturer="Peblar",
-            model_id=self.coordinator.data[CHARGER_PART_NUMBER_KEY],
-        )
+    @callback
+    def _async_write_changed_state(self) -> None:
+        """Write state when availability or the backing value changed."""
+        should_write = self._should_write()
+        available = self.available
+        if should_write or available != self._written_available:
+            self._written_available = available
+            super()._handle_coordinator_update()
@@ -0,0 +1,127 @@
+"""Shared poll scheduler for all Peblar chargers."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import FLEET_MAX_CONCURRENT_POLLS, FLEET_POLL_JITTER
+from .coordinator import PeblarCoordinator
+
+
+class PeblarFleet:
+    """Poll every Peblar coordinator from a single scheduler.
+
+    Each charger gets a random phase within its poll interval so chargers do
+    not all poll in the same second, and at most FLEET_MAX_CONCURRENT_POLLS
+    polls run at once. Every poll is bounded by the coordinator's own
+    deadline, so a slow charger only holds its own slot, and a failing
+    charger backs off until its circuit breaker only lets probes through.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fleet poller."""
+        self.hass = hass
+        self._semaphore = asyncio.Semaphore(FLEET_MAX_CONCURRENT_POLLS)
+        self._due: dict[PeblarCoordinator, float] = {}
+        self._polling: set[PeblarCoordinator] = set()
+        # Coordinators to poll again as soon as their running poll ends
+        self._repoll: set[PeblarCoordinator] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_add(
+        self, coordinator: PeblarCoordinator, delay: float | None = None
+    ) -> None:
+        """Start polling a coordinator after delay seconds.
+
+        Without a delay the first poll lands at a random point within the
+        coordinator's poll interval.
+        """
+        if delay is None:
+            delay = random.uniform(0, coordinator.poll_interval)
+        self._due[coordinator] = time.monotonic() + delay
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), "peblar fleet poller"
+            )
+        self._wakeup.set()
+
+    @callback
+    def async_poll_soon(self, coordinator: PeblarCoordinator) -> None:
+        """Poll a coordinator as soon as a slot is free, e.g. after a write."""
+        if coordinator not in self._due:
+            return
+        if coordinator in self._polling:
+            self._repoll.add(coordinator)
+            return
+        self._due[coordinator] = time.monotonic()
+        self._wakeup.set()
+
+    @callback
+    def async_remove(self, coordinator: PeblarCoordinator) -> None:
+        """Stop polling a coordinator."""
+        self._due.pop(coordinator, None)
+        self._repoll.discard(coordinator)
+        if not self._due and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        """Start the polls that are due and sleep until the next one."""
+        while True:
+            now = time.monotonic()
+            next_due: float | None = None
+            for coordinator, due in self._due.items():
+                if coordinator in self._polling:
+                    continue
+                if due <= now:
+                    self._polling.add(coordinator)
+                    self.hass.async_create_background_task(
+                        self._async_poll(coordinator),
+                        f"peblar poll {coordinator.name}",
+                    )
+                elif next_due is None or due < next_due:
+                    next_due = due
+
+            self._wakeup.clear()
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(
+                    None if next_due is None else next_due - now
+                ):
+                    await self._wakeup.wait()
+
+    async def _async_poll(self, coordinator: PeblarCoordinator) -> None:
+        """Refresh one coordinator and schedule its next poll.
+
+        When nothing has expired yet, for instance because a write refreshed
+        the charger in between, the poll is skipped and moved to the earliest
+        expiry instead of fetching nothing.
+        """
+        next_due: float | None = None
+        try:
+            if (wait := coordinator.seconds_until_due()) > 0:
+                next_due = time.monotonic() + wait
+            else:
+                async with self._semaphore:
+                    await coordinator.async_refresh()
+        finally:
+            self._polling.discard(coordinator)
+            if (due := self._due.get(coordinator)) is not None:
+                if next_due is None:
+                    # Only stretch the interval, a shorter one would poll
+                    # before the endpoints expire
+                    interval = coordinator.next_poll_delay * random.uniform(
+                        1, 1 + FLEET_POLL_JITTER
+                    )
+                    next_due = max(due + interval, time.monotonic())
+                if coordinator in self._repoll:
+                    self._repoll.discard(coordinator)
+                    next_due = time.monotonic()
+                self._due[coordinator] = next_due
+            self._wakeup.set()
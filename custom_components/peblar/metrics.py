@@ -0,0 +1,138 @@
+"""Derived metrics computed incrementally from the Peblar meter data."""
+
+from __future__ import annotations
+
+from collections import deque
+
+from .const import (
+    CHARGER_CHARGE_POWER_KEY,
+    CHARGER_CURRENT_PHASE1_KEY,
+    CHARGER_CURRENT_PHASE2_KEY,
+    CHARGER_CURRENT_PHASE3_KEY,
+    CHARGER_TOTAL_ENERGY_KEY,
+    METRICS_MAX_SAMPLES,
+)
+from .snapshot import PeblarSnapshot
+
+
+class RollingAverage:
+    """Time-weighted average over the last span seconds.
+
+    Each sample is weighted by the time since the previous one, so polling
+    faster while charging does not skew the average. Samples are kept in a
+    bounded deque with running sums, every update is amortized O(1).
+    """
+
+    def __init__(self, span: float, max_samples: int = METRICS_MAX_SAMPLES) -> None:
+        """Initialize an empty window."""
+        self._span = span
+        self._max_samples = max_samples
+        self._samples: deque[tuple[float, float, float]] = deque()
+        self._weighted_sum = 0.0
+        self._duration = 0.0
+        self._last_time: float | None = None
+
+    def add(self, now: float, value: float) -> None:
+        """Add a sample taken at monotonic time now."""
+        if self._last_time is not None and (duration := now - self._last_time) > 0:
+            if len(self._samples) == self._max_samples:
+                self._drop_oldest()
+            self._samples.append((now, value * duration, duration))
+            self._weighted_sum += value * duration
+            self._duration += duration
+        self._last_time = now
+        while self._samples and self._samples[0][0] <= now - self._span:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        """Remove the oldest sample from the running sums."""
+        _, weighted, duration = self._samples.popleft()
+        self._weighted_sum -= weighted
+        self._duration -= duration
+
+    @property
+    def value(self) -> float | None:
+        """Return the average, or None before the second sample."""
+        if self._duration <= 0:
+            return None
+        return self._weighted_sum / self._duration
+
+
+class RollingRate:
+    """Rate of change of a counter over the last span seconds."""
+
+    def __init__(self, span: float, max_samples: int = METRICS_MAX_SAMPLES) -> None:
+        """Initialize an empty window."""
+        self._span = span
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, now: float, value: float) -> None:
+        """Add a counter reading taken at monotonic time now."""
+        if self._samples and value < self._samples[-1][1]:
+            # The counter was reset, start over
+            self._samples.clear()
+        self._samples.append((now, value))
+        while self._samples[0][0] < now - self._span:
+            self._samples.popleft()
+
+    @property
+    def value(self) -> float | None:
+        """Return the increase per second, or None before the second reading."""
+        if len(self._samples) < 2:
+            return None
+        (first_time, first), (last_time, last) = self._samples[0], self._samples[-1]
+        return (last - first) / (last_time - first_time)
+
+
+class PeblarMetrics:
+    """Rolling power averages, energy rate and phase imbalance of a charger."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self._power_5m = RollingAverage(5 * 60)
+        self._power_15m = RollingAverage(15 * 60)
+        self._energy_rate = RollingRate(15 * 60)
+        self.phase_imbalance: float | None = None
+
+    def update(self, data: PeblarSnapshot, now: float) -> None:
+        """Add the meter values of a new snapshot."""
+        if (power := data.get(CHARGER_CHARGE_POWER_KEY)) is not None:
+            self._power_5m.add(now, power)
+            self._power_15m.add(now, power)
+        if (energy := data.get(CHARGER_TOTAL_ENERGY_KEY)) is not None:
+            self._energy_rate.add(now, energy)
+        currents = [
+            current
+            for key in (
+                CHARGER_CURRENT_PHASE1_KEY,
+                CHARGER_CURRENT_PHASE2_KEY,
+                CHARGER_CURRENT_PHASE3_KEY,
+            )
+            if (current := data.get(key)) is not None
+        ]
+        if currents:
+            mean = sum(currents) / len(currents)
+            # Largest deviation from the mean current, in percent of the mean
+            self.phase_imbalance = (
+                max(abs(current - mean) for current in currents) / mean * 100
+                if mean
+                else 0.0
+            )
+
+    @property
+    def power_average_5m(self) -> float | None:
+        """Return the 5 minute average charge power in W."""
+        return self._power_5m.value
+
+    @property
+    def power_average_15m(self) -> float | None:
+        """Return the 15 minute average charge power in W."""
+        return self._power_15m.value
+
+    @property
+    def energy_rate(self) -> float | None:
+        """Return the energy rate over the last 15 minutes in kWh/h."""
+        if (rate := self._energy_rate.value) is None:
+            return None
+        # Wh per second to kWh per hour
+        return rate * 3600 / 1000
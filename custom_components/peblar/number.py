@@ -12,12 +12,16 @@ from typing import cast
 from homeassistant.components.number import NumberEntity, NumberEntityDescription
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CHARGER_MAX_CHARGING_CURRENT_KEY, CHARGER_SERIAL_NUMBER_KEY, DOMAIN
-from .coordinator import InvalidAuth, PeblarCoordinator
-from .entity import PeblarEntity
+from .const import (
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CHARGER_SERIAL_NUMBER_KEY,
+    DOMAIN,
+    ENDPOINT_EVINTERFACE,
+)
+from .coordinator import PeblarCoordinator
+from .entity import PeblarEntity, register_fields
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -27,11 +31,14 @@ class PeblarNumberEntityDescription(NumberEntityDescription):
     max_value_fn: Callable[[PeblarCoordinator], float]
     min_value_fn: Callable[[PeblarCoordinator], float]
     set_value_fn: Callable[[PeblarCoordinator], Callable[[float], Awaitable[None]]]
+    # Endpoint the value is read from, fetched while the entity is enabled
+    endpoint: str | None = None
 
 
 NUMBER_TYPES: dict[str, PeblarNumberEntityDescription] = {
     CHARGER_MAX_CHARGING_CURRENT_KEY: PeblarNumberEntityDescription(
         key=CHARGER_MAX_CHARGING_CURRENT_KEY,
+        endpoint=ENDPOINT_EVINTERFACE,
         translation_key=CHARGER_MAX_CHARGING_CURRENT_KEY,
         max_value_fn=lambda _: 20000.0,
         min_value_fn=lambda _: 0.0,
@@ -39,6 +46,7 @@ NUMBER_TYPES: dict[str, PeblarNumberEntityDescription] = {
         native_step=1,
     ),
 }
+register_fields(NUMBER_TYPES.values())
 
 
 async def async_setup_entry(
@@ -46,15 +54,9 @@ async def async_setup_entry(
 ) -> None:
     """Create Peblar number entities in HASS."""
     coordinator: PeblarCoordinator = hass.data[DOMAIN][entry.entry_id]
-    # Check if the user has sufficient rights to change values, if so, add number component:
-    try:
-        await coordinator.async_set_charging_current(
-            coordinator.data[CHARGER_MAX_CHARGING_CURRENT_KEY]
-        )
-    except InvalidAuth:
+    # Skip the number component once a write has been refused for this token
+    if coordinator.write_access is False:
         return
-    except ConnectionError as exc:
-        raise PlatformNotReady from exc
 
     async_add_entities(
         PeblarNumber(coordinator, entry, description)
@@ -82,6 +84,11 @@ class PeblarNumber(PeblarEntity, NumberEntity):
             f"{description.key}-{coordinator.data[CHARGER_SERIAL_NUMBER_KEY]}"
         )
 
+    @property
+    def available(self) -> bool:
+        """Return False once the access token turned out to be read-only."""
+        return super().available and self.coordinator.write_access is not False
+
     @property
     def native_max_value(self) -> float:
         """Return the maximum available value."""
@@ -1,77 +1,159 @@
 """Peblar class"""
 
+import asyncio
+from collections import deque
 import json
+import time
 
-import requests
+import aiohttp
+
+ENDPOINTS = ("system", "meter", "evinterface")
+
+# Stats key of charging current writes
+WRITE = "write"
+
+
+class PeblarEndpointError(aiohttp.ClientError):
+    """One or more endpoints failed while fetching charger data."""
+
+    def __init__(self, errors, results):
+        self.errors = errors
+        self.results = results
+        super().__init__(
+            "Failed to fetch "
+            + ", ".join(f"{endpoint} ({err!r})" for endpoint, err in errors.items())
+        )
+
+
+class PeblarStats:
+    """Rolling request latencies and error counters of one charger."""
+
+    def __init__(self, window=100):
+        self._window = window
+        self.latencies = {}
+        self.requests = 0
+        self.timeouts = 0
+        self.http_errors = 0
+        self.connection_errors = 0
+        self.retries = 0
+
+    def record(self, key, seconds):
+        """Add a latency sample in seconds."""
+        if (samples := self.latencies.get(key)) is None:
+            samples = self.latencies[key] = deque(maxlen=self._window)
+        samples.append(seconds)
+
+    def percentile(self, key, percentile):
+        """Return a latency percentile in seconds over the rolling window."""
+        if not (samples := self.latencies.get(key)):
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "http_errors": self.http_errors,
+            "connection_errors": self.connection_errors,
+            "retries": self.retries,
+            "latency_ms": {
+                key: {
+                    f"p{percentile}": round(self.percentile(key, percentile) * 1000, 1)
+                    for percentile in (50, 95, 99)
+                }
+                for key in self.latencies
+            },
+        }
 
 
 class Peblar:
-    def __init__(self, token, address, requestGetTimeout=None):
+    def __init__(self, token, address, session, requestGetTimeout=None):
         self.token = token
         self.address = address
+        self._session: aiohttp.ClientSession = session
         self._requestGetTimeout = requestGetTimeout
         self.baseUrl = "http://" + self.address + "/api/wlac/v1/"
         self.headers = {
             "Content-type": "application/json",
             "Authorization": f"{self.token}",
         }
+        self.stats = PeblarStats()
 
     @property
     def requestGetTimeout(self):
         return self._requestGetTimeout
 
-    def authenticate(self):
-        try:
-            response = requests.get(
-                f"{self.baseUrl}system",
-                headers=self.headers,
-                timeout=self._requestGetTimeout,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            raise (err)
-
-    def getChargerData(self):
-        try:
-            response = requests.get(
-                f"{self.baseUrl}system",
-                headers=self.headers,
-                timeout=self._requestGetTimeout,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            raise (err)
-        result1 = json.loads(response.text)
-        try:
-            response = requests.get(
-                f"{self.baseUrl}meter",
-                headers=self.headers,
-                timeout=self._requestGetTimeout,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            raise (err)
-        result2 = json.loads(response.text)
-        try:
-            response = requests.get(
-                f"{self.baseUrl}evinterface",
-                headers=self.headers,
-                timeout=self._requestGetTimeout,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            raise (err)
-        result3 = json.loads(response.text)
-        return result1 | result2 | result3
-
-    def setMaxChargingCurrent(self, newMaxChargingCurrentValue):
-        try:
-            response = requests.patch(
-                f"{self.baseUrl}evinterface",
-                headers=self.headers,
+    async def _request(self, method, endpoint, data=None, statsKey=None):
+        # A GET is retried once when the charger closed the kept-alive connection
+        attempts = 2 if method == "GET" else 1
+        for attempt in range(1, attempts + 1):
+            self.stats.requests += 1
+            start = time.monotonic()
+            try:
+                async with self._session.request(
+                    method,
+                    f"{self.baseUrl}{endpoint}",
+                    headers=self.headers,
+                    data=data,
+                    timeout=self._requestGetTimeout,
+                ) as response:
+                    response.raise_for_status()
+                    payload = await response.read()
+            except aiohttp.ServerDisconnectedError:
+                if attempt < attempts:
+                    self.stats.retries += 1
+                    continue
+                self.stats.connection_errors += 1
+                raise
+            except aiohttp.ClientResponseError:
+                self.stats.http_errors += 1
+                raise
+            except TimeoutError:
+                self.stats.timeouts += 1
+                raise
+            except aiohttp.ClientError:
+                self.stats.connection_errors += 1
+                raise
+            self.stats.record(statsKey or endpoint, time.monotonic() - start)
+            return payload
+
+    async def close(self):
+        """Release the connections of the client, the session is not closed."""
+
+    async def authenticate(self):
+        await self._request("GET", "system")
+
+    async def getEndpoints(self, endpoints=ENDPOINTS):
+        """Fetch the given endpoints concurrently.
+
+        Returns a dict of endpoint to raw response body. If any endpoint fails
+        a PeblarEndpointError is raised naming every failed endpoint and
+        carrying the bodies of the endpoints that did succeed.
+        """
+        responses = await asyncio.gather(
+            *(self._request("GET", endpoint) for endpoint in endpoints),
+            return_exceptions=True,
+        )
+        results = {}
+        errors = {}
+        for endpoint, response in zip(endpoints, responses):
+            if isinstance(response, BaseException):
+                if not isinstance(response, (aiohttp.ClientError, TimeoutError)):
+                    raise response
+                errors[endpoint] = response
+            else:
+                results[endpoint] = response
+        if errors:
+            raise PeblarEndpointError(errors, results)
+        return results
+
+    async def setMaxChargingCurrent(self, newMaxChargingCurrentValue):
+        return json.loads(
+            await self._request(
+                "PATCH",
+                "evinterface",
                 data=f'{{ "ChargeCurrentLimit": {newMaxChargingCurrentValue}}}',
-                timeout=self._requestGetTimeout,
+                statsKey=WRITE,
             )
-        except requests.exceptions.HTTPError as err:
-            raise (err)
-        return json.loads(response.text)
+        )
@@ -0,0 +1,136 @@
+"""On-demand profiling of the hot paths of the integration."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+from .const import PROFILE_STATS_LINES, PROFILE_TRACEMALLOC_FRAMES
+
+# Allocations are only reported when integration code is on their traceback
+_INTEGRATION_FILES = os.path.join(os.path.dirname(__file__), "*")
+
+
+class PeblarProfiler:
+    """Collect a cProfile profile, section timings and allocation sites.
+
+    Coordinators and entities only look the profiler up while it is set, so
+    it costs nothing outside the profiling window. cProfile is only enabled
+    around synchronous sections, awaiting the charger is timed but not
+    profiled so other tasks on the event loop stay out of the profile.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize a profiler writing to path .txt and .prof."""
+        self.path = path
+        self._profile = cProfile.Profile()
+        self._depth = 0
+        self._timings: dict[str, list[float]] = defaultdict(list)
+        self._tracemalloc_started = False
+        self._start_snapshot: tracemalloc.Snapshot | None = None
+        self._end_snapshot: tracemalloc.Snapshot | None = None
+        self._started: float | None = None
+        self._duration = 0.0
+
+    def start(self) -> None:
+        """Start tracing allocations, in the executor."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._tracemalloc_started = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._started = time.monotonic()
+
+    def stop(self) -> None:
+        """Stop tracing allocations, in the executor.
+
+        Tracing started elsewhere keeps running.
+        """
+        self._end_snapshot = tracemalloc.take_snapshot()
+        if self._tracemalloc_started:
+            tracemalloc.stop()
+        if self._started is not None:
+            self._duration = time.monotonic() - self._started
+
+    @contextmanager
+    def profile(self, section: str) -> Iterator[None]:
+        """Profile and time a synchronous section."""
+        enabled = False
+        if not self._depth:
+            try:
+                self._profile.enable()
+                enabled = True
+            except ValueError:
+                # Another profiler is active, only time the section
+                pass
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timings[section].append(time.perf_counter() - start)
+            self._depth -= 1
+            if enabled:
+                self._profile.disable()
+
+    @contextmanager
+    def timed(self, section: str) -> Iterator[None]:
+        """Time a section that awaits, without profiling it."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timings[section].append(time.perf_counter() - start)
+
+    def write(self) -> dict[str, dict[str, float]]:
+        """Write the report and profile, in the executor.
+
+        Returns the count, total and maximum milliseconds of every section.
+        """
+        sections = {
+            section: {
+                "count": len(samples),
+                "total_ms": round(sum(samples) * 1000, 3),
+                "max_ms": round(max(samples) * 1000, 3),
+            }
+            for section, samples in sorted(self._timings.items())
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        report = io.StringIO()
+        report.write(f"Peblar profile over {self._duration:.1f} s\n\nSections\n")
+        for section, timing in sections.items():
+            report.write(
+                f"  {section:<14} {timing['count']:>8} calls "
+                f"{timing['total_ms']:>12.3f} ms total "
+                f"{timing['max_ms']:>10.3f} ms max\n"
+            )
+
+        report.write("\nProfile\n")
+        try:
+            stats = pstats.Stats(self._profile, stream=report)
+        except TypeError:
+            # Nothing ran while the profile was enabled
+            report.write("  no calls recorded\n")
+        else:
+            stats.sort_stats("cumulative").print_stats(PROFILE_STATS_LINES)
+            self._profile.dump_stats(f"{self.path}.prof")
+
+        report.write("\nAllocations\n")
+        if self._start_snapshot is not None and self._end_snapshot is not None:
+            filters = [tracemalloc.Filter(True, _INTEGRATION_FILES, all_frames=True)]
+            for stat in (
+                self._end_snapshot.filter_traces(filters).compare_to(
+                    self._start_snapshot.filter_traces(filters), "lineno"
+                )[:PROFILE_STATS_LINES]
+            ):
+                report.write(f"  {stat}\n")
+
+        with open(f"{self.path}.txt", "w", encoding="utf-8") as file:
+            file.write(report.getvalue())
+        return sections
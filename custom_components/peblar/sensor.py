@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
 import logging
 from datetime import datetime
@@ -15,10 +16,13 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfEnergy,
     UnitOfPower,
     UnitOfElectricPotential,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -41,12 +45,28 @@ from .const import (
     CHARGER_POWER_PHASE3_KEY,
     CHARGER_CP_STATE_DESCRIPTION_KEY,
     CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY,
+    DIAGNOSTIC_BREAKER_STATE_KEY,
+    DIAGNOSTIC_ERRORS_KEY,
+    DIAGNOSTIC_EVINTERFACE_LATENCY_KEY,
+    DIAGNOSTIC_METER_LATENCY_KEY,
+    DIAGNOSTIC_RETRIES_KEY,
+    DIAGNOSTIC_SYSTEM_LATENCY_KEY,
+    DIAGNOSTIC_TIMEOUTS_KEY,
+    DIAGNOSTIC_WRITE_LATENCY_KEY,
     DOMAIN,
+    ENDPOINT_EVINTERFACE,
+    ENDPOINT_METER,
+    ENDPOINT_SYSTEM,
+    METRIC_ENERGY_RATE_KEY,
+    METRIC_PHASE_IMBALANCE_KEY,
+    METRIC_POWER_AVERAGE_15M_KEY,
+    METRIC_POWER_AVERAGE_5M_KEY,
+    OPT_IN_ENDPOINTS,
 )
+from .breaker import BreakerState
 from .coordinator import PeblarCoordinator
-from .entity import PeblarEntity
-
-UPDATE_INTERVAL = 30
+from .entity import PeblarEntity, register_fields
+from .peblar import WRITE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,11 +77,31 @@ class PeblarSensorEntityDescription(SensorEntityDescription):
 
     precision: int | None = None
     last_reset: datetime | None = None
+    # Minimum change of the value before a new state is written
+    deadband: float | None = None
+    # Read the value from the coordinator instead of the snapshot key
+    value_fn: Callable[[PeblarCoordinator], StateType] | None = None
+    # Stay available while the charger cannot be reached
+    always_available: bool = False
+    # Endpoint the value is read from, fetched while the entity is enabled
+    endpoint: str | None = None
+
+
+def _latency_ms(stats_key: str) -> Callable[[PeblarCoordinator], StateType]:
+    """Return a value function for the 95th percentile latency of a request."""
+
+    def value(coordinator: PeblarCoordinator) -> StateType:
+        if (latency := coordinator.stats.percentile(stats_key, 95)) is None:
+            return None
+        return latency * 1000
+
+    return value
 
 
 SENSOR_TYPES: dict[str, PeblarSensorEntityDescription] = {
     CHARGER_MAX_CHARGING_CURRENT_KEY: PeblarSensorEntityDescription(
         key=CHARGER_MAX_CHARGING_CURRENT_KEY,
+        endpoint=ENDPOINT_EVINTERFACE,
         translation_key=CHARGER_MAX_CHARGING_CURRENT_KEY,
         native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
         device_class=SensorDeviceClass.CURRENT,
@@ -69,77 +109,101 @@ SENSOR_TYPES: dict[str, PeblarSensorEntityDescription] = {
     ),
     CHARGER_CP_STATE_DESCRIPTION_KEY: PeblarSensorEntityDescription(
         key=CHARGER_CP_STATE_DESCRIPTION_KEY,
+        endpoint=ENDPOINT_EVINTERFACE,
         translation_key=CHARGER_CP_STATE_DESCRIPTION_KEY,
     ),
     CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY: PeblarSensorEntityDescription(
         key=CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY,
+        endpoint=ENDPOINT_EVINTERFACE,
         translation_key=CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY,
     ),
     CHARGER_CURRENT_PHASE1_KEY: PeblarSensorEntityDescription(
         key=CHARGER_CURRENT_PHASE1_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_CURRENT_PHASE1_KEY,
         native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=100.0,
     ),
     CHARGER_VOLTAGE_PHASE1_KEY: PeblarSensorEntityDescription(
         key=CHARGER_VOLTAGE_PHASE1_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_VOLTAGE_PHASE1_KEY,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
+        precision=1,
+        deadband=1.0,
     ),
     CHARGER_POWER_PHASE1_KEY: PeblarSensorEntityDescription(
         key=CHARGER_POWER_PHASE1_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_POWER_PHASE1_KEY,
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=10.0,
     ),
     CHARGER_CURRENT_PHASE2_KEY: PeblarSensorEntityDescription(
         key=CHARGER_CURRENT_PHASE2_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_CURRENT_PHASE2_KEY,
         native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=100.0,
     ),
     CHARGER_VOLTAGE_PHASE2_KEY: PeblarSensorEntityDescription(
         key=CHARGER_VOLTAGE_PHASE2_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_VOLTAGE_PHASE2_KEY,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
+        precision=1,
+        deadband=1.0,
     ),
     CHARGER_POWER_PHASE2_KEY: PeblarSensorEntityDescription(
         key=CHARGER_POWER_PHASE2_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_POWER_PHASE2_KEY,
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=10.0,
     ),
     CHARGER_CURRENT_PHASE3_KEY: PeblarSensorEntityDescription(
         key=CHARGER_CURRENT_PHASE3_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_CURRENT_PHASE3_KEY,
         native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=100.0,
     ),
     CHARGER_VOLTAGE_PHASE3_KEY: PeblarSensorEntityDescription(
         key=CHARGER_VOLTAGE_PHASE3_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_VOLTAGE_PHASE3_KEY,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
+        precision=1,
+        deadband=1.0,
     ),
     CHARGER_POWER_PHASE3_KEY: PeblarSensorEntityDescription(
         key=CHARGER_POWER_PHASE3_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_POWER_PHASE3_KEY,
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=10.0,
     ),
     CHARGER_TOTAL_ENERGY_KEY: PeblarSensorEntityDescription(
         key=CHARGER_TOTAL_ENERGY_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_TOTAL_ENERGY_KEY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
@@ -147,6 +211,7 @@ SENSOR_TYPES: dict[str, PeblarSensorEntityDescription] = {
     ),
     CHARGER_SESSION_ENERGY_KEY: PeblarSensorEntityDescription(
         key=CHARGER_SESSION_ENERGY_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_SESSION_ENERGY_KEY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
@@ -154,14 +219,123 @@ SENSOR_TYPES: dict[str, PeblarSensorEntityDescription] = {
     ),
     CHARGER_CHARGE_POWER_KEY: PeblarSensorEntityDescription(
         key=CHARGER_CHARGE_POWER_KEY,
+        endpoint=ENDPOINT_METER,
         translation_key=CHARGER_CHARGE_POWER_KEY,
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=10.0,
     ),
 }
 
 
+METRIC_SENSOR_TYPES: tuple[PeblarSensorEntityDescription, ...] = (
+    PeblarSensorEntityDescription(
+        key=METRIC_POWER_AVERAGE_5M_KEY,
+        endpoint=ENDPOINT_METER,
+        translation_key=METRIC_POWER_AVERAGE_5M_KEY,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        precision=0,
+        deadband=10.0,
+        value_fn=lambda coordinator: coordinator.metrics.power_average_5m,
+    ),
+    PeblarSensorEntityDescription(
+        key=METRIC_POWER_AVERAGE_15M_KEY,
+        endpoint=ENDPOINT_METER,
+        translation_key=METRIC_POWER_AVERAGE_15M_KEY,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        precision=0,
+        deadband=10.0,
+        value_fn=lambda coordinator: coordinator.metrics.power_average_15m,
+    ),
+    PeblarSensorEntityDescription(
+        key=METRIC_ENERGY_RATE_KEY,
+        endpoint=ENDPOINT_METER,
+        translation_key=METRIC_ENERGY_RATE_KEY,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        precision=2,
+        deadband=0.01,
+        value_fn=lambda coordinator: coordinator.metrics.energy_rate,
+    ),
+    PeblarSensorEntityDescription(
+        key=METRIC_PHASE_IMBALANCE_KEY,
+        endpoint=ENDPOINT_METER,
+        translation_key=METRIC_PHASE_IMBALANCE_KEY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        precision=1,
+        deadband=1.0,
+        value_fn=lambda coordinator: coordinator.metrics.phase_imbalance,
+    ),
+)
+
+
+register_fields((*SENSOR_TYPES.values(), *METRIC_SENSOR_TYPES))
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[PeblarSensorEntityDescription, ...] = (
+    *(
+        PeblarSensorEntityDescription(
+            key=key,
+            translation_key=key,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            precision=0,
+            deadband=5.0,
+            value_fn=_latency_ms(stats_key),
+        )
+        for key, stats_key in (
+            (DIAGNOSTIC_SYSTEM_LATENCY_KEY, ENDPOINT_SYSTEM),
+            (DIAGNOSTIC_METER_LATENCY_KEY, ENDPOINT_METER),
+            (DIAGNOSTIC_EVINTERFACE_LATENCY_KEY, ENDPOINT_EVINTERFACE),
+            (DIAGNOSTIC_WRITE_LATENCY_KEY, WRITE),
+        )
+    ),
+    PeblarSensorEntityDescription(
+        key=DIAGNOSTIC_TIMEOUTS_KEY,
+        translation_key=DIAGNOSTIC_TIMEOUTS_KEY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.stats.timeouts,
+    ),
+    PeblarSensorEntityDescription(
+        key=DIAGNOSTIC_ERRORS_KEY,
+        translation_key=DIAGNOSTIC_ERRORS_KEY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: (
+            coordinator.stats.http_errors + coordinator.stats.connection_errors
+        ),
+    ),
+    PeblarSensorEntityDescription(
+        key=DIAGNOSTIC_RETRIES_KEY,
+        translation_key=DIAGNOSTIC_RETRIES_KEY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.stats.retries,
+    ),
+    PeblarSensorEntityDescription(
+        key=DIAGNOSTIC_BREAKER_STATE_KEY,
+        translation_key=DIAGNOSTIC_BREAKER_STATE_KEY,
+        device_class=SensorDeviceClass.ENUM,
+        options=[state.value for state in BreakerState],
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.breaker.state,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -173,6 +347,18 @@ async def async_setup_entry(
         for ent in coordinator.data
         if (description := SENSOR_TYPES.get(ent))
     )
+    # Opt-in endpoints are not fetched before one of their entities is
+    # enabled, their descriptions set entity_registry_enabled_default=False
+    async_add_entities(
+        PeblarSensor(coordinator, description)
+        for description in SENSOR_TYPES.values()
+        if description.endpoint in OPT_IN_ENDPOINTS
+        and description.key not in coordinator.data
+    )
+    async_add_entities(
+        PeblarSensor(coordinator, description)
+        for description in (*METRIC_SENSOR_TYPES, *DIAGNOSTIC_SENSOR_TYPES)
+    )
 
 
 class PeblarSensor(PeblarEntity, SensorEntity):
@@ -191,17 +377,49 @@ class PeblarSensor(PeblarEntity, SensorEntity):
         self._attr_unique_id = (
             f"{description.key}-{coordinator.data[CHARGER_SERIAL_NUMBER_KEY]}"
         )
+        self._written_value: StateType = None
+
+    @property
+    def available(self) -> bool:
+        """Return True while the coordinator has data for always available sensors."""
+        if self.entity_description.always_available:
+            return self.coordinator.data is not None
+        return super().available
+
+    def _value(self) -> StateType:
+        """Return the unrounded value of the sensor."""
+        if (value_fn := self.entity_description.value_fn) is not None:
+            return value_fn(self.coordinator)
+        return cast(StateType, self.coordinator.data[self.entity_description.key])
+
+    def _should_write(self) -> bool:
+        """Skip changes that stay within the deadband of the last written value.
+
+        A value dropping to zero is always written so a stopped charge does not
+        keep showing a small residual.
+        """
+        value = self._value()
+        if self.entity_description.value_fn is not None:
+            if value == self._written_value:
+                return False
+        elif not super()._should_write():
+            return False
+        if (
+            (deadband := self.entity_description.deadband) is not None
+            and value
+            and self._written_value is not None
+            and abs(value - self._written_value) < deadband
+        ):
+            return False
+        self._written_value = value
+        return True
 
     @property
     def native_value(self) -> StateType:
         """Return the state of the sensor. Round the value when it, and the precision property are not None."""
+        value = self._value()
         if (
             sensor_round := self.entity_description.precision
-        ) is not None and self.coordinator.data[
-            self.entity_description.key
-        ] is not None:
-            return cast(
-                StateType,
-                round(self.coordinator.data[self.entity_description.key], sensor_round),
-            )
-        return cast(StateType, self.coordinator.data[self.entity_description.key])
+        ) is not None and value is not None:
+            return cast(StateType, round(cast(float, value), sensor_round))
+        return value
@@ -0,0 +1,418 @@
+"""Services for the peblar integration."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import os
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .buffer import SampleBuffer
+from .const import (
+    ATTR_BUFFER,
+    ATTR_CHARGING_CURRENT,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_CURRENTS,
+    ATTR_DURATION,
+    ATTR_END,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_INTERVAL,
+    ATTR_MONTH,
+    ATTR_SPEED,
+    ATTR_START,
+    BULK_WRITE_MAX_CONCURRENT,
+    BURST_DEFAULT_DURATION,
+    BURST_DEFAULT_INTERVAL,
+    BURST_MAX_DURATION,
+    BURST_MIN_INTERVAL,
+    CHARGER_SERIAL_NUMBER_KEY,
+    DATA_FLEET,
+    DOMAIN,
+    EXPORT_BUFFER_BURST,
+    EXPORT_BUFFER_SAMPLES,
+    EXPORT_FORMAT_BINARY,
+    EXPORT_FORMAT_CSV,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_MAX_DURATION,
+    SERVICE_GET_SESSIONS,
+    SERVICE_PROFILE,
+    SERVICE_EXPORT_SAMPLES,
+    SERVICE_REPLAY_TRACE,
+    SERVICE_SET_CHARGING_CURRENT_BULK,
+    SERVICE_START_BURST,
+    SESSION_MONTH_FORMAT,
+    WRITE_CONFIRM_DELAY,
+)
+from .coordinator import InvalidAuth, PeblarCoordinator
+from .fleet import PeblarFleet
+from .profiler import PeblarProfiler
+from .trace import read_trace
+
+EXPORT_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_BINARY]
+        ),
+        vol.Optional(ATTR_BUFFER, default=EXPORT_BUFFER_SAMPLES): vol.In(
+            [EXPORT_BUFFER_SAMPLES, EXPORT_BUFFER_BURST]
+        ),
+    }
+)
+
+START_BURST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DURATION, default=BURST_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=BURST_MAX_DURATION)
+        ),
+        vol.Optional(ATTR_INTERVAL, default=BURST_DEFAULT_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=BURST_MIN_INTERVAL)
+        ),
+    }
+)
+
+REPLAY_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_SPEED, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+    }
+)
+
+GET_SESSIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_MONTH): vol.Match(r"^\d{4}-(0[1-9]|1[0-2])$"),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_DURATION, default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+    }
+)
+
+_CHARGING_CURRENT = vol.All(vol.Coerce(int), vol.Range(min=0))
+
+
+def _has_one_current(data: dict[str, Any]) -> dict[str, Any]:
+    """Require either a map of currents or a single charging current."""
+    if (ATTR_CURRENTS in data) == (ATTR_CHARGING_CURRENT in data):
+        raise vol.Invalid(
+            f"Specify either {ATTR_CURRENTS} or {ATTR_CHARGING_CURRENT}"
+        )
+    return data
+
+
+SET_CHARGING_CURRENT_BULK_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_CURRENTS, "chargers"): {cv.string: _CHARGING_CURRENT},
+            vol.Exclusive(ATTR_CONFIG_ENTRY_ID, "chargers"): vol.All(
+                cv.ensure_list, [cv.string]
+            ),
+            vol.Optional(ATTR_CHARGING_CURRENT): _CHARGING_CURRENT,
+        }
+    ),
+    _has_one_current,
+)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> PeblarCoordinator:
+    """Return the coordinator of the config entry a service call targets."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    if (coordinator := hass.data.get(DOMAIN, {}).get(entry_id)) is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="entry_not_loaded",
+            translation_placeholders={"entry_id": entry_id},
+        )
+    return coordinator
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    """Return a service datetime as a UNIX timestamp."""
+    if value is None:
+        return None
+    return dt_util.as_local(value).timestamp()
+
+
+def _write_export(
+    buffer: SampleBuffer, segments: list[bytes], path: str, export_format: str
+) -> int:
+    """Write exported segments to a file, in the executor."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if export_format == EXPORT_FORMAT_BINARY:
+        with open(path, "wb") as file:
+            return buffer.write_binary(segments, file)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        return buffer.write_csv(segments, file)
+
+
+def _export_path(
+    hass: HomeAssistant, coordinator: PeblarCoordinator, name: str, extension: str
+) -> str:
+    """Return the path of a new export file in the config directory."""
+    stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+    serial_number = coordinator.data[CHARGER_SERIAL_NUMBER_KEY]
+    return hass.config.path(DOMAIN, f"{serial_number}-{name}-{stamp}.{extension}")
+
+
+async def _async_export_samples(call: ServiceCall) -> ServiceResponse:
+    """Export a time window of the meter or burst sample buffer to a file."""
+    hass = call.hass
+    coordinator = _get_coordinator(hass, call)
+    export_format: str = call.data[ATTR_FORMAT]
+    name: str = call.data[ATTR_BUFFER]
+    buffer = (
+        coordinator.burst_samples
+        if name == EXPORT_BUFFER_BURST
+        else coordinator.samples
+    )
+    if buffer is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN, translation_key="no_burst_samples"
+        )
+    # Copy only the requested rows on the event loop, format them in the executor
+    segments = buffer.window(
+        _timestamp(call.data.get(ATTR_START)), _timestamp(call.data.get(ATTR_END))
+    )
+    path = _export_path(
+        hass,
+        coordinator,
+        name,
+        "csv" if export_format == EXPORT_FORMAT_CSV else "bin",
+    )
+    samples = await hass.async_add_executor_job(
+        _write_export, buffer, segments, path, export_format
+    )
+    return {"path": path, "samples": samples}
+
+
+async def _async_start_burst(call: ServiceCall) -> None:
+    """Start a high-rate capture of one charger into its burst buffer."""
+    coordinator = _get_coordinator(call.hass, call)
+    coordinator.async_start_burst(call.data[ATTR_DURATION], call.data[ATTR_INTERVAL])
+
+
+async def _async_replay_trace(call: ServiceCall) -> ServiceResponse:
+    """Replay a captured trace through a charger's decode path and entities."""
+    hass = call.hass
+    coordinator = _get_coordinator(hass, call)
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    # Only traces in the peblar folder of the config directory can be replayed
+    filename = os.path.basename(call.data.get(ATTR_FILENAME, f"trace-{entry_id}.gz"))
+    path = hass.config.path(DOMAIN, filename)
+    try:
+        records = await hass.async_add_executor_job(
+            lambda: list(read_trace(path))
+        )
+    except (OSError, ValueError) as err:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_trace",
+            translation_placeholders={"path": path, "error": str(err)},
+        ) from err
+
+    fleet: PeblarFleet = hass.data[DATA_FLEET]
+    fleet.async_remove(coordinator)
+    start = time.monotonic()
+    try:
+        await coordinator.async_replay(records, call.data[ATTR_SPEED])
+    finally:
+        if hass.data[DOMAIN].get(entry_id) is coordinator:
+            fleet.async_add(coordinator, 0)
+    return {"records": len(records), "seconds": round(time.monotonic() - start, 3)}
+
+
+async def _async_set_charging_current_bulk(call: ServiceCall) -> ServiceResponse:
+    """Write charging currents to many chargers at once.
+
+    The writes run concurrently, at most BULK_WRITE_MAX_CONCURRENT at a time,
+    and all written chargers are confirmed by polls through the fleet. A
+    pending debounced write of a charger is dropped in favour of the bulk
+    value.
+    """
+    hass = call.hass
+    coordinators: dict[str, PeblarCoordinator] = hass.data.get(DOMAIN, {})
+    if ATTR_CURRENTS in call.data:
+        targets: dict[str, int] = call.data[ATTR_CURRENTS]
+    else:
+        # Without a selection every loaded charger gets the current
+        targets = dict.fromkeys(
+            call.data.get(ATTR_CONFIG_ENTRY_ID, coordinators),
+            call.data[ATTR_CHARGING_CURRENT],
+        )
+    for entry_id in targets:
+        if entry_id not in coordinators:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="entry_not_loaded",
+                translation_placeholders={"entry_id": entry_id},
+            )
+
+    semaphore = asyncio.Semaphore(BULK_WRITE_MAX_CONCURRENT)
+
+    async def write(entry_id: str, charging_current: int) -> dict[str, Any]:
+        coordinator = coordinators[entry_id]
+        # A debounced write from the number entity must not land afterwards
+        coordinator.async_cancel_pending_write()
+        async with semaphore:
+            try:
+                response = await coordinator.async_write_charging_current(
+                    charging_current
+                )
+            except InvalidAuth:
+                return {"success": False, "error": "invalid_auth"}
+            except ConnectionError:
+                return {"success": False, "error": "cannot_connect"}
+        return {
+            "success": True,
+            "charging_current": coordinator.async_apply_write_response(
+                charging_current, response
+            ),
+        }
+
+    start = time.monotonic()
+    results = dict(
+        zip(
+            targets,
+            await asyncio.gather(*(write(*target) for target in targets.items())),
+            strict=True,
+        )
+    )
+    written = [
+        coordinators[entry_id]
+        for entry_id, result in results.items()
+        if result["success"]
+    ]
+
+    @callback
+    def confirm(_now: datetime) -> None:
+        for coordinator in written:
+            coordinator.async_confirm_write()
+
+    if written:
+        async_call_later(hass, WRITE_CONFIRM_DELAY, confirm)
+    return {"seconds": round(time.monotonic() - start, 3), "results": results}
+
+
+async def _async_get_sessions(call: ServiceCall) -> ServiceResponse:
+    """Return the charging sessions of a charger that started in a month."""
+    coordinator = _get_coordinator(call.hass, call)
+    month = call.data.get(ATTR_MONTH) or dt_util.now().strftime(SESSION_MONTH_FORMAT)
+    return {
+        "month": month,
+        "sessions": [
+            session.as_dict() for session in coordinator.sessions.sessions(month)
+        ],
+    }
+
+
+async def _async_profile(call: ServiceCall) -> ServiceResponse:
+    """Profile polling, decoding and entity writes of chargers for a while.
+
+    Without a selection every loaded charger is profiled. The call returns
+    once the report is written to the peblar folder of the config directory.
+    """
+    hass = call.hass
+    coordinators: dict[str, PeblarCoordinator] = hass.data.get(DOMAIN, {})
+    entry_ids = call.data.get(ATTR_CONFIG_ENTRY_ID, list(coordinators))
+    for entry_id in entry_ids:
+        if entry_id not in coordinators:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="entry_not_loaded",
+                translation_placeholders={"entry_id": entry_id},
+            )
+    if any(coordinator.profiler is not None for coordinator in coordinators.values()):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN, translation_key="profile_running"
+        )
+
+    profiler = PeblarProfiler(
+        hass.config.path(DOMAIN, f"profile-{dt_util.now():%Y%m%d-%H%M%S}")
+    )
+    profiled = [coordinators[entry_id] for entry_id in entry_ids]
+    # Allocation snapshots take seconds after a long window, keep them and
+    # the report off the event loop
+    await hass.async_add_executor_job(profiler.start)
+    for coordinator in profiled:
+        coordinator.profiler = profiler
+    try:
+        await asyncio.sleep(call.data[ATTR_DURATION])
+    finally:
+        for coordinator in profiled:
+            coordinator.profiler = None
+        await hass.async_add_executor_job(profiler.stop)
+    sections = await hass.async_add_executor_job(profiler.write)
+    return {"path": f"{profiler.path}.txt", "sections": sections}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Peblar services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_SAMPLES,
+        _async_export_samples,
+        schema=EXPORT_SAMPLES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_BURST,
+        _async_start_burst,
+        schema=START_BURST_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY_TRACE,
+        _async_replay_trace,
+        schema=REPLAY_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CHARGING_CURRENT_BULK,
+        _async_set_charging_current_bulk,
+        schema=SET_CHARGING_CURRENT_BULK_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SESSIONS,
+        _async_get_sessions,
+        schema=GET_SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,160 @@
+"""Charging session detection and history for a Peblar."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CHARGER_CHARGE_POWER_KEY,
+    CHARGER_CP_STATE_KEY,
+    CHARGER_SESSION_ENERGY_KEY,
+    CONNECTED_CP_STATES,
+    DOMAIN,
+    PHASE_CURRENT_KEYS,
+    PHASE_IN_USE_CURRENT,
+    SESSION_MONTH_FORMAT,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+
+@dataclass(slots=True)
+class ChargingSession:
+    """One period an EV was connected to the charger.
+
+    Times are UNIX timestamps, end is None while the EV is connected.
+    """
+
+    start: float
+    end: float | None = None
+    # Wh
+    energy: float = 0
+    # W
+    peak_power: float = 0
+    # Bit n is set when phase n + 1 carried current
+    phases: int = 0
+
+    @property
+    def month(self) -> str:
+        """Return the local month the session started in."""
+        return dt_util.as_local(dt_util.utc_from_timestamp(self.start)).strftime(
+            SESSION_MONTH_FORMAT
+        )
+
+    def as_record(self) -> list[Any]:
+        """Return the compact form kept in storage."""
+        return [self.start, self.end, self.energy, self.peak_power, self.phases]
+
+    @classmethod
+    def from_record(cls, record: list[Any]) -> ChargingSession:
+        """Return a session from its stored form."""
+        return cls(*record)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the session for a service response."""
+        return {
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "end": None
+            if self.end is None
+            else dt_util.utc_from_timestamp(self.end).isoformat(),
+            "energy": round(self.energy / 1000, 3),
+            "peak_power": self.peak_power,
+            "phases": [
+                phase + 1
+                for phase in range(len(PHASE_CURRENT_KEYS))
+                if self.phases & 1 << phase
+            ],
+        }
+
+
+class SessionTracker:
+    """Detect charging sessions in the snapshots of one charger.
+
+    A session starts when the charge state shows a connected EV and ends
+    when it no longer does, or when the session energy drops because the
+    charger started a new session in between two polls. Finished sessions
+    are stored per month of their start, so a month is read without going
+    through the recorder. The running session is stored too and survives a
+    restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the tracker of a config entry."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.sessions.{entry_id}"
+        )
+        self._months: dict[str, list[list[Any]]] = {}
+        self._save_pending = False
+        self.active: ChargingSession | None = None
+
+    async def async_load(self) -> None:
+        """Load the session history."""
+        if not (stored := await self._store.async_load()):
+            return
+        self._months = stored.get("months", {})
+        if (active := stored.get("active")) is not None:
+            self.active = ChargingSession.from_record(active)
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        self._save_pending = False
+        return {
+            "active": None if self.active is None else self.active.as_record(),
+            "months": self._months,
+        }
+
+    @callback
+    def async_update(self, data: Any, timestamp: float) -> None:
+        """Follow the charge state, energy and power of a new snapshot."""
+        if (cp_state := data.get(CHARGER_CP_STATE_KEY)) is None:
+            return
+        connected = cp_state in CONNECTED_CP_STATES
+        energy = data.get(CHARGER_SESSION_ENERGY_KEY)
+        session = self.active
+        finished = session is not None and (
+            not connected or (energy is not None and energy < session.energy)
+        )
+        if finished:
+            assert session is not None
+            session.end = timestamp
+            self._months.setdefault(session.month, []).append(session.as_record())
+            session = self.active = None
+        if connected:
+            if session is None:
+                session = self.active = ChargingSession(timestamp)
+            if energy is not None:
+                session.energy = energy
+            if (power := data.get(CHARGER_CHARGE_POWER_KEY)) is not None:
+                session.peak_power = max(session.peak_power, power)
+            for phase, key in enumerate(PHASE_CURRENT_KEYS):
+                if (data.get(key) or 0) > PHASE_IN_USE_CURRENT:
+                    session.phases |= 1 << phase
+        # Store restarts its delay on every call, only schedule one save at a
+        # time so frequent polls do not postpone it forever
+        if (finished or connected) and not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def sessions(self, month: str) -> list[ChargingSession]:
+        """Return the sessions started in a month, the running one last."""
+        sessions = [
+            ChargingSession.from_record(record)
+            for record in self._months.get(month, ())
+        ]
+        if self.active is not None and self.active.month == month:
+            sessions.append(self.active)
+        return sessions
+
+    async def async_save(self) -> None:
+        """Write the session history right away."""
+        await self._store.async_save(self._data_to_store())
+
+    async def async_remove(self) -> None:
+        """Remove the stored session history."""
+        await self._store.async_remove()
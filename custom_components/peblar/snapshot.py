@@ -0,0 +1,135 @@
+"""Typed snapshot of the data read from a Peblar charger."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from homeassistant.util.json import json_loads_object
+
+from .const import (
+    CHARGER_CHARGE_POWER_KEY,
+    CHARGER_CHARGING_CURRENT_ACTUAL_KEY,
+    CHARGER_CP_STATE_DESCRIPTION_KEY,
+    CHARGER_CP_STATE_KEY,
+    CHARGER_CURRENT_PHASE1_KEY,
+    CHARGER_CURRENT_PHASE2_KEY,
+    CHARGER_CURRENT_PHASE3_KEY,
+    CHARGER_CURRENT_VERSION_KEY,
+    CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY,
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CHARGER_PART_NUMBER_KEY,
+    CHARGER_POWER_PHASE1_KEY,
+    CHARGER_POWER_PHASE2_KEY,
+    CHARGER_POWER_PHASE3_KEY,
+    CHARGER_SERIAL_NUMBER_KEY,
+    CHARGER_SESSION_ENERGY_KEY,
+    CHARGER_TOTAL_ENERGY_KEY,
+    CHARGER_VOLTAGE_PHASE1_KEY,
+    CHARGER_VOLTAGE_PHASE2_KEY,
+    CHARGER_VOLTAGE_PHASE3_KEY,
+)
+
+FIELDS: tuple[str, ...] = (
+    CHARGER_CURRENT_VERSION_KEY,
+    CHARGER_PART_NUMBER_KEY,
+    CHARGER_SERIAL_NUMBER_KEY,
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CHARGER_CHARGING_CURRENT_ACTUAL_KEY,
+    CHARGER_LIMIT_SOURCE_DESCRIPTION_KEY,
+    CHARGER_CP_STATE_KEY,
+    CHARGER_CP_STATE_DESCRIPTION_KEY,
+    CHARGER_TOTAL_ENERGY_KEY,
+    CHARGER_SESSION_ENERGY_KEY,
+    CHARGER_CHARGE_POWER_KEY,
+    CHARGER_CURRENT_PHASE1_KEY,
+    CHARGER_VOLTAGE_PHASE1_KEY,
+    CHARGER_POWER_PHASE1_KEY,
+    CHARGER_CURRENT_PHASE2_KEY,
+    CHARGER_VOLTAGE_PHASE2_KEY,
+    CHARGER_POWER_PHASE2_KEY,
+    CHARGER_CURRENT_PHASE3_KEY,
+    CHARGER_VOLTAGE_PHASE3_KEY,
+    CHARGER_POWER_PHASE3_KEY,
+)
+
+_FIELD_SET = frozenset(FIELDS)
+
+# Raw API key to field, filled on first sight of every key. Unknown keys map
+# to None so they are skipped without lowercasing them again.
+_FIELD_MAP: dict[str, str | None] = {field: field for field in FIELDS}
+
+
+def _field(key: str) -> str | None:
+    """Return the snapshot field of a raw API key."""
+    try:
+        return _FIELD_MAP[key]
+    except KeyError:
+        field = key.lower()
+        _FIELD_MAP[key] = field = field if field in _FIELD_SET else None
+        return field
+
+
+def decode_fields(payload: dict[str, Any]) -> dict[str, Any]:
+    """Return the known snapshot fields of a decoded endpoint payload."""
+    return {
+        field: value
+        for key, value in payload.items()
+        if (field := _field(key)) is not None
+    }
+
+
+def decode_endpoint(raw: bytes) -> dict[str, Any]:
+    """Decode the raw response body of an endpoint into snapshot fields."""
+    return decode_fields(json_loads_object(raw))
+
+
+class PeblarSnapshot:
+    """Merged data of all endpoints, one slot per known field.
+
+    Supports read-only mapping access so entities can keep looking values up
+    by key; fields that were not reported read as None.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, *partials: dict[str, Any]) -> None:
+        """Merge decoded endpoint fields into a snapshot."""
+        for partial in partials:
+            for field, value in partial.items():
+                setattr(self, field, value)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the value of a field."""
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key, None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of a field, or default when it was not reported."""
+        if key not in _FIELD_SET:
+            return default
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a field was reported."""
+        return key in _FIELD_SET and getattr(self, key, None) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the reported fields."""
+        return (field for field in FIELDS if getattr(self, field, None) is not None)
+
+    def diff(self, other: PeblarSnapshot | None) -> set[str]:
+        """Return the fields whose value differs from another snapshot."""
+        if other is None:
+            return set(self)
+        return {
+            field
+            for field in FIELDS
+            if getattr(self, field, None) != getattr(other, field, None)
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the reported fields as a dict."""
+        return {field: getattr(self, field) for field in self}
@@ -0,0 +1,225 @@
+"""Follow the solar surplus with the charging current of a Peblar."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime
+import logging
+import math
+import time
+from typing import Any
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfPower
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+
+from .const import (
+    CHARGER_CP_STATE_KEY,
+    CHARGER_MAX_CHARGING_CURRENT_KEY,
+    CHARGER_VOLTAGE_PHASE1_KEY,
+    CONF_HYSTERESIS,
+    CONF_MAX_CURRENT,
+    CONF_MIN_CURRENT,
+    CONF_SURPLUS_ENTITY,
+    CONF_SURPLUS_SMOOTHING,
+    CONF_SURPLUS_WRITE_INTERVAL,
+    CONNECTED_CP_STATES,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_MAX_CURRENT,
+    DEFAULT_MIN_CURRENT,
+    DEFAULT_SURPLUS_SMOOTHING,
+    DEFAULT_SURPLUS_WRITE_INTERVAL,
+    NOMINAL_VOLTAGE,
+    PHASE_CURRENT_KEYS,
+    PHASE_IN_USE_CURRENT,
+)
+from .coordinator import ACTIVE_CP_STATES, InvalidAuth, PeblarCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PeblarSurplusController:
+    """Adjust the charging current of one charger to the grid power.
+
+    Follows the state changes of a grid power sensor, positive when importing
+    and negative when exporting, so it reacts as soon as the meter reports
+    instead of on the next poll of the charger. Readings are smoothed with an
+    exponential moving average. A new limit is only written when it differs
+    from the current one by more than the hysteresis and at most once per
+    write interval, a change held back by the interval is written when the
+    interval ends. Below the minimum current charging is paused. Nothing is
+    written while no EV is connected.
+
+    With load balancing the balancer does not write this charger but sets a
+    ceiling, the controller keeps the limit at or below it and lowers a
+    limit above it right away.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: PeblarCoordinator,
+        options: Mapping[str, Any],
+    ) -> None:
+        """Initialize the controller from the options of the charger."""
+        self.hass = hass
+        self._coordinator = coordinator
+        self._entity_id: str = options[CONF_SURPLUS_ENTITY]
+        self._smoothing: float = options.get(
+            CONF_SURPLUS_SMOOTHING, DEFAULT_SURPLUS_SMOOTHING
+        )
+        self._write_interval: float = options.get(
+            CONF_SURPLUS_WRITE_INTERVAL, DEFAULT_SURPLUS_WRITE_INTERVAL
+        )
+        self._min_current = options.get(CONF_MIN_CURRENT, DEFAULT_MIN_CURRENT) * 1000
+        self._max_current = options.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT) * 1000
+        self._hysteresis = options.get(CONF_HYSTERESIS, DEFAULT_HYSTERESIS) * 1000
+        # Smoothed grid power in W
+        self.grid_power: float | None = None
+        self._last_reading: float | None = None
+        self._last_write: float | None = None
+        self._writing = False
+        # Highest current in mA load balancing allows, None without it
+        self.ceiling: float | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+        self._unsub_retry: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start following the grid power sensor."""
+        self._coordinator.surplus = self
+        self._unsub = async_track_state_change_event(
+            self.hass, self._entity_id, self._async_state_changed
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the grid power sensor."""
+        if self._coordinator.surplus is self:
+            self._coordinator.surplus = None
+        for unsub in (self._unsub, self._unsub_retry):
+            if unsub is not None:
+                unsub()
+        self._unsub = self._unsub_retry = None
+
+    @callback
+    def _async_state_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Smooth a new grid power reading and act on it."""
+        if (state := event.data["new_state"]) is None:
+            return
+        try:
+            power = float(state.state)
+        except ValueError:
+            # unknown or unavailable
+            return
+        if state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) == UnitOfPower.KILO_WATT:
+            power *= 1000
+        self._filter(power, time.monotonic())
+        self._async_evaluate()
+
+    def _filter(self, power: float, now: float) -> None:
+        """Add a reading to the moving average, weighted by its age."""
+        if self.grid_power is None or self._last_reading is None or not self._smoothing:
+            self.grid_power = power
+        else:
+            alpha = 1 - math.exp(-(now - self._last_reading) / self._smoothing)
+            self.grid_power += alpha * (power - self.grid_power)
+        self._last_reading = now
+
+    @callback
+    def async_set_ceiling(self, ceiling: float) -> None:
+        """Set the highest current load balancing allows and act on it."""
+        self.ceiling = ceiling
+        self._async_evaluate()
+
+    def _capped(self, target: float) -> float:
+        """Return a target within the maximum current and the ceiling."""
+        target = min(target, self._max_current)
+        if self.ceiling is not None:
+            target = min(target, self.ceiling)
+        return 0 if target < self._min_current else target
+
+    def _target(self, data: Any, grid_power: float) -> float:
+        """Return the charging current in mA that uses up the surplus."""
+        limit = data[CHARGER_MAX_CHARGING_CURRENT_KEY]
+        charging = data.get(CHARGER_CP_STATE_KEY) in ACTIVE_CP_STATES
+        # Until the phases in use show up in a poll assume all three, which
+        # underestimates the current instead of importing
+        phases = (
+            sum(
+                (data.get(key) or 0) > PHASE_IN_USE_CURRENT
+                for key in PHASE_CURRENT_KEYS
+            )
+            if charging
+            else 0
+        ) or 3
+        voltage = data.get(CHARGER_VOLTAGE_PHASE1_KEY) or NOMINAL_VOLTAGE
+        # A charging EV is assumed to draw its limit, so the effect of a write
+        # is taken into account before the next poll of the charger
+        drawn = limit * phases if charging else 0
+        return self._capped(int((drawn - grid_power / voltage * 1000) / phases))
+
+    @callback
+    def _async_retry(self, _now: datetime) -> None:
+        """Act on the latest reading once the write interval has passed."""
+        self._unsub_retry = None
+        self._async_evaluate()
+
+    @callback
+    def _async_evaluate(self) -> None:
+        """Write a new charging current when the surplus changed enough.
+
+        A limit above the ceiling is lowered regardless of the hysteresis
+        and the write interval, so the site stays within its budget.
+        """
+        coordinator = self._coordinator
+        data = coordinator.data
+        if (
+            self._writing
+            or data is None
+            or data.get(CHARGER_CP_STATE_KEY) not in CONNECTED_CP_STATES
+            or coordinator.write_access is False
+            or (limit := data.get(CHARGER_MAX_CHARGING_CURRENT_KEY)) is None
+        ):
+            return
+        over_ceiling = self.ceiling is not None and limit > self.ceiling
+        if self.grid_power is not None:
+            target = self._target(data, self.grid_power)
+        elif over_ceiling:
+            target = self._capped(limit)
+        else:
+            return
+        if not over_ceiling and abs(target - limit) <= self._hysteresis:
+            return
+        now = time.monotonic()
+        if (
+            not over_ceiling
+            and self._last_write is not None
+            and (wait := self._last_write + self._write_interval - now) > 0
+        ):
+            if self._unsub_retry is None:
+                self._unsub_retry = async_call_later(self.hass, wait, self._async_retry)
+            return
+        self._last_write = now
+        self._writing = True
+        self.hass.async_create_task(self._async_write(target))
+
+    async def _async_write(self, target: float) -> None:
+        """Write a charging current to the charger and show it right away."""
+        try:
+            response = await self._coordinator.async_write_charging_current(target)
+        except (InvalidAuth, ConnectionError) as err:
+            _LOGGER.error(
+                "Error setting Peblar charging current for surplus charging: %s",
+                repr(err),
+            )
+            return
+        finally:
+            self._writing = False
+        self._coordinator.async_apply_write_response(target, response)
@@ -0,0 +1,213 @@
+"""Telemetry export of Peblar meter snapshots to MQTT and OpenMetrics."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import json_dumps
+
+from .const import (
+    CONF_BATCH_INTERVAL,
+    CONF_BUFFER_SIZE,
+    CONF_MQTT_TOPIC,
+    DOMAIN,
+    TELEMETRY_FIELDS,
+    TELEMETRY_METRICS_URL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Buffered snapshot: charger, UNIX timestamp, values of TELEMETRY_FIELDS
+Sample = tuple[str, float, tuple[Any, ...]]
+
+
+class PeblarTelemetryExporter:
+    """Publish the meter snapshots of all chargers outside the state machine.
+
+    Coordinators hand every snapshot with meter data to async_record(), which
+    only appends it to a bounded buffer, dropping the oldest snapshot when
+    the buffer is full. Every batch interval the buffer is published as one
+    compact message per charger to <mqtt_topic>/<serial number>. Batches
+    that fail stay buffered for the next interval. The OpenMetrics view
+    serves the latest snapshot of every charger.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: dict[str, Any],
+        publish: Callable[[str, str], Awaitable[None]] | None = None,
+    ) -> None:
+        """Initialize the exporter, publish defaults to the MQTT integration."""
+        self.hass = hass
+        self._topic: str | None = config.get(CONF_MQTT_TOPIC)
+        self._interval: timedelta = config[CONF_BATCH_INTERVAL]
+        self._buffer: deque[Sample] = deque(maxlen=config[CONF_BUFFER_SIZE])
+        self._publish = publish or self._async_mqtt_publish
+        self._publishing = False
+        self._failing = False
+        self._unsub: CALLBACK_TYPE | None = None
+        # Latest snapshot of every charger for the OpenMetrics view
+        self.latest: dict[str, tuple[float, tuple[Any, ...]]] = {}
+        self.dropped = 0
+        self.published = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start publishing batches when an MQTT topic is configured."""
+        if self._topic is None:
+            return
+        self._unsub = async_track_time_interval(
+            self.hass,
+            self._async_flush,
+            self._interval,
+            name="peblar telemetry",
+            cancel_on_shutdown=True,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop publishing batches."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_record(self, charger: str, timestamp: float, data: Any) -> None:
+        """Buffer the meter fields of a snapshot."""
+        values = tuple(map(data.get, TELEMETRY_FIELDS))
+        self.latest[charger] = (timestamp, values)
+        if self._topic is None:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((charger, timestamp, values))
+
+    def _requeue(self, samples: Iterable[Sample]) -> None:
+        """Put unpublished samples back in front of the newer ones."""
+        maxlen = self._buffer.maxlen
+        assert maxlen is not None
+        buffer = deque([*samples, *self._buffer])
+        self.dropped += max(len(buffer) - maxlen, 0)
+        self._buffer = deque(buffer, maxlen=maxlen)
+
+    async def _async_flush(self, _now: datetime | None = None) -> None:
+        """Publish the buffered snapshots, one message per charger."""
+        if self._publishing or not self._buffer:
+            return
+        self._publishing = True
+        batches: dict[str, list[Sample]] = {}
+        for sample in self._buffer:
+            batches.setdefault(sample[0], []).append(sample)
+        self._buffer.clear()
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._publish(f"{self._topic}/{charger}", self._payload(samples))
+                    for charger, samples in batches.items()
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            self._publishing = False
+        failed: list[Sample] = []
+        for samples, result in zip(batches.values(), results, strict=True):
+            if isinstance(result, Exception):
+                failed.extend(samples)
+                if not self._failing:
+                    self._failing = True
+                    _LOGGER.warning(
+                        "Error publishing Peblar telemetry, buffering up to %s "
+                        "snapshots: %s",
+                        self._buffer.maxlen,
+                        repr(result),
+                    )
+            else:
+                self.published += len(samples)
+        if failed:
+            self._requeue(failed)
+        elif self._failing:
+            self._failing = False
+            _LOGGER.info("Publishing Peblar telemetry again")
+
+    @staticmethod
+    def _payload(samples: list[Sample]) -> str:
+        """Return the compact JSON of a batch of one charger.
+
+        Field names are sent once, every sample is the timestamp followed by
+        the values in the order of the fields.
+        """
+        return json_dumps(
+            {
+                "fields": TELEMETRY_FIELDS,
+                "samples": [
+                    [round(timestamp, 3), *values] for _, timestamp, values in samples
+                ],
+            }
+        )
+
+    async def _async_mqtt_publish(self, topic: str, payload: str) -> None:
+        """Publish a message through the MQTT integration."""
+        if "mqtt" not in self.hass.config.components:
+            raise HomeAssistantError("MQTT is not set up")
+        # Only imported when MQTT export is used, it is not a requirement
+        from homeassistant.components import mqtt  # noqa: PLC0415
+
+        await mqtt.async_publish(self.hass, topic, payload)
+
+    def openmetrics(self) -> str:
+        """Return the latest snapshot of every charger as OpenMetrics text."""
+        lines: list[str] = []
+        for index, field in enumerate(TELEMETRY_FIELDS):
+            name = f"{DOMAIN}_{field}"
+            lines.append(f"# TYPE {name} gauge")
+            for charger, (timestamp, values) in self.latest.items():
+                if (value := values[index]) is not None:
+                    lines.append(
+                        f'{name}{{charger="{_escape(charger)}"}} {value} '
+                        f"{timestamp:.3f}"
+                    )
+        for name, value in (
+            ("telemetry_published", self.published),
+            ("telemetry_dropped", self.dropped),
+        ):
+            lines.append(f"# TYPE {DOMAIN}_{name} counter")
+            lines.append(f"{DOMAIN}_{name}_total {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Escape an OpenMetrics label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PeblarMetricsView(HomeAssistantView):
+    """Serve the latest meter snapshots for OpenMetrics scrapers."""
+
+    url = TELEMETRY_METRICS_URL
+    name = "api:peblar:metrics"
+
+    def __init__(self, exporter: PeblarTelemetryExporter) -> None:
+        """Initialize the view."""
+        self._exporter = exporter
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        return web.Response(
+            text=self._exporter.openmetrics(),
+            headers={"Content-Type": OPENMETRICS_CONTENT_TYPE},
+        )
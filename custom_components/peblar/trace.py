@@ -0,0 +1,89 @@
+"""Compact on-disk traces of raw Peblar responses."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import gzip
+import os
+import struct
+
+from .const import TRACE_FLUSH_INTERVAL, TRACE_MAX_BYTES
+from .peblar import ENDPOINTS
+
+# A trace is a gzip stream starting with the magic and format version,
+# followed by records of a header and the unchanged response body. Every
+# flush appends a gzip member, which readers see as one continuous stream.
+TRACE_MAGIC = b"PBLT"
+TRACE_VERSION = 1
+# Timestamp, index of the endpoint in ENDPOINTS, length of the body
+RECORD_HEADER = struct.Struct("<dBI")
+
+
+class TraceWriter:
+    """Collect raw responses in memory and append them to a trace file.
+
+    record() only packs the response on the event loop, write() does the
+    compression and file IO and runs in the executor. The file is rotated to
+    a single .1 backup once it grows past TRACE_MAX_BYTES.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize a writer for a trace file."""
+        self.path = path
+        self._pending: list[bytes] = []
+        self._last_flush: float | None = None
+
+    def record(self, timestamp: float, endpoint: str, body: bytes) -> None:
+        """Add a raw endpoint response."""
+        self._pending.append(
+            RECORD_HEADER.pack(timestamp, ENDPOINTS.index(endpoint), len(body))
+        )
+        self._pending.append(body)
+
+    def due(self, now: float) -> bool:
+        """Return whether pending records should be written."""
+        if self._last_flush is None:
+            self._last_flush = now
+        return bool(self._pending) and now - self._last_flush >= TRACE_FLUSH_INTERVAL
+
+    def take(self, now: float | None = None) -> list[bytes]:
+        """Return and clear the pending records."""
+        if now is not None:
+            self._last_flush = now
+        pending, self._pending = self._pending, []
+        return pending
+
+    def write(self, chunks: list[bytes]) -> None:
+        """Append records to the trace file, in the executor."""
+        if not chunks:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size > TRACE_MAX_BYTES:
+            os.replace(self.path, f"{self.path}.1")
+            size = 0
+        with gzip.open(self.path, "ab") as file:
+            if not size:
+                file.write(TRACE_MAGIC + bytes((TRACE_VERSION,)))
+            file.write(b"".join(chunks))
+
+
+def read_trace(path: str) -> Iterator[tuple[float, str, bytes]]:
+    """Yield the timestamp, endpoint and raw body of every traced response."""
+    with gzip.open(path, "rb") as file:
+        header = TRACE_MAGIC + bytes((TRACE_VERSION,))
+        if file.read(len(header)) != header:
+            raise ValueError(f"{path} is not a Peblar trace")
+        try:
+            while record := file.read(RECORD_HEADER.size):
+                timestamp, endpoint, length = RECORD_HEADER.unpack(record)
+                body = file.read(length)
+                if len(body) < length:
+                    return
+                yield timestamp, ENDPOINTS[endpoint], body
+        except (EOFError, struct.error):
+            # The last member was cut off, e.g. by a crash while writing
+            return
@@ -0,0 +1,224 @@
+"""Benchmark the Peblar polling and control paths against the simulator.
+
+Starts scripts/peblar_simulator.py in a subprocess (so its CPU time is not
+counted) and reports, for the Peblar client and for PeblarCoordinator:
+
+* poll latency percentiles over full system/meter/evinterface polls
+* CPU time of this process per poll
+* peak number of extra threads while polling (executor usage)
+* write round-trip time of the charging current PATCH
+
+    python scripts/benchmark.py --chargers 20 --rounds 50 --latency 30
+
+Requires aiohttp and homeassistant to be installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from custom_components.peblar.peblar import ENDPOINTS, Peblar  # noqa: E402
+
+TOKEN = "token"
+
+
+class Recorder:
+    """Collect latencies, CPU time and thread usage of one benchmark."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize an empty recording."""
+        self.name = name
+        self.latencies: list[float] = []
+        self.cpu_time = 0.0
+        self.baseline_threads = threading.active_count()
+        self.peak_threads = self.baseline_threads
+
+    async def timed(self, call: Callable[[], Awaitable[Any]]) -> None:
+        """Await call and record its latency."""
+        start = time.perf_counter()
+        await call()
+        self.latencies.append(time.perf_counter() - start)
+        self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def result(self) -> dict[str, Any]:
+        """Return the summary of the recording."""
+        latencies = sorted(self.latencies)
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "name": self.name,
+            "samples": len(latencies),
+            "p50_ms": round(percentiles[49] * 1000, 2),
+            "p90_ms": round(percentiles[89] * 1000, 2),
+            "p99_ms": round(percentiles[98] * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "cpu_ms_per_op": round(self.cpu_time / len(latencies) * 1000, 3),
+            "extra_threads": self.peak_threads - self.baseline_threads,
+        }
+
+
+async def run_rounds(
+    recorder: Recorder,
+    rounds: int,
+    calls: list[Callable[[], Awaitable[Any]]],
+) -> dict[str, Any]:
+    """Run every call concurrently, rounds times, and summarize."""
+    cpu_start = time.process_time()
+    for _ in range(rounds):
+        await asyncio.gather(*(recorder.timed(call) for call in calls))
+    recorder.cpu_time = time.process_time() - cpu_start
+    return recorder.result()
+
+
+async def bench_client(
+    args: argparse.Namespace, session: aiohttp.ClientSession
+) -> list[dict[str, Any]]:
+    """Benchmark the Peblar client directly."""
+    clients = [
+        Peblar(TOKEN, f"{args.host}:{args.port + index}", session)
+        for index in range(args.chargers)
+    ]
+    poll = await run_rounds(
+        Recorder("Peblar poll"),
+        args.rounds,
+        [client.getEndpoints for client in clients],
+    )
+    write = await run_rounds(
+        Recorder("Peblar write"),
+        args.rounds,
+        [
+            lambda client=client: client.setMaxChargingCurrent(16000)
+            for client in clients
+        ],
+    )
+    return [poll, write]
+
+
+async def bench_coordinator(
+    args: argparse.Namespace, session: aiohttp.ClientSession
+) -> list[dict[str, Any]]:
+    """Benchmark PeblarCoordinator polls and writes."""
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.peblar.coordinator import PeblarCoordinator
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        coordinators = [
+            PeblarCoordinator(
+                Peblar(TOKEN, f"{args.host}:{args.port + index}", session),
+                hass,
+                SimpleNamespace(entry_id=f"bench{index}", options={}),
+            )
+            for index in range(args.chargers)
+        ]
+
+        async def full_poll(coordinator: PeblarCoordinator) -> None:
+            for endpoint in ENDPOINTS:
+                coordinator.async_expire_endpoint(endpoint)
+            await coordinator.async_refresh()
+
+        poll = await run_rounds(
+            Recorder("PeblarCoordinator poll"),
+            args.rounds,
+            [lambda c=c: full_poll(c) for c in coordinators],
+        )
+        write = await run_rounds(
+            Recorder("PeblarCoordinator write"),
+            args.rounds,
+            [
+                lambda c=c: c.async_write_charging_current(16000)
+                for c in coordinators
+            ],
+        )
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+    return [poll, write]
+
+
+async def start_simulator(args: argparse.Namespace) -> asyncio.subprocess.Process:
+    """Start the simulator and wait until it listens."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(ROOT / "scripts" / "peblar_simulator.py"),
+        "--host",
+        args.host,
+        "--port",
+        str(args.port),
+        "--chargers",
+        str(args.chargers),
+        "--latency",
+        str(args.latency),
+        "--jitter",
+        str(args.jitter),
+        "--seed",
+        str(args.seed),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    assert process.stdout is not None
+    await process.stdout.readline()
+    return process
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmarks and print the results."""
+    simulator = await start_simulator(args)
+    try:
+        async with aiohttp.ClientSession() as session:
+            results = await bench_client(args, session)
+            if not args.skip_coordinator:
+                results += await bench_coordinator(args, session)
+    finally:
+        simulator.terminate()
+        await simulator.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print(format_row(columns))
+    for result in results:
+        print(format_row([result[column] for column in columns]))
+
+
+def format_row(values: list[Any]) -> str:
+    """Format one row of the result table."""
+    return " | ".join(
+        f"{value!s:>24}" if index == 0 else f"{value!s:>13}"
+        for index, value in enumerate(values)
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--chargers", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=20, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=10, help="milliseconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-coordinator", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,165 @@
+"""Local stand-in for an MQTT broker that counts Peblar telemetry.
+
+Accepts MQTT 3.1.1 clients, acknowledges connects, subscriptions and QoS 1
+publishes, and reports the telemetry batches published under a topic
+prefix. Point the Home Assistant MQTT integration (protocol 3.1.1) at it,
+together with the simulator, to check the telemetry export end to end:
+
+    python scripts/mqtt_sink.py --port 1883 --topic peblar
+
+Nothing is forwarded to subscribers. Every interval the messages, snapshots
+and bytes received per charger are printed, --verbose prints every batch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+import json
+import struct
+import time
+
+CONNECT = 1
+PUBLISH = 3
+SUBSCRIBE = 8
+UNSUBSCRIBE = 10
+PINGREQ = 12
+DISCONNECT = 14
+
+
+class Totals:
+    """Telemetry received per charger."""
+
+    def __init__(self) -> None:
+        """Initialize empty totals."""
+        self.messages: dict[str, int] = defaultdict(int)
+        self.samples: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.invalid = 0
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    """Return the type, flags and body of the next control packet."""
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    for shift in range(0, 28, 7):
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    return header >> 4, header & 0x0F, await reader.readexactly(length)
+
+
+class Sink:
+    """Serve MQTT clients and count the telemetry they publish."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Initialize the sink from the command line arguments."""
+        self.args = args
+        self.totals = Totals()
+
+    def _publish(self, flags: int, body: bytes) -> bytes | None:
+        """Count a publish, return the PUBACK for QoS 1."""
+        (topic_length,) = struct.unpack(">H", body[:2])
+        topic = body[2 : 2 + topic_length].decode()
+        offset = 2 + topic_length
+        ack = None
+        if qos := (flags >> 1) & 0x03:
+            ack = bytes((0x40, 2)) + body[offset : offset + 2]
+            offset += 2
+        payload = body[offset:]
+        prefix = f"{self.args.topic}/"
+        if not topic.startswith(prefix):
+            return ack if qos == 1 else None
+        charger = topic[len(prefix) :]
+        try:
+            samples = len(json.loads(payload)["samples"])
+        except (ValueError, KeyError, TypeError):
+            self.totals.invalid += 1
+            return ack if qos == 1 else None
+        self.totals.messages[charger] += 1
+        self.totals.samples[charger] += samples
+        self.totals.bytes[charger] += len(payload)
+        if self.args.verbose:
+            print(f"{topic}: {samples} snapshot(s), {len(payload)} bytes", flush=True)
+        return ack if qos == 1 else None
+
+    async def session(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer the control packets of one client."""
+        try:
+            while True:
+                packet, flags, body = await read_packet(reader)
+                if packet == CONNECT:
+                    writer.write(bytes((0x20, 2, 0, 0)))
+                elif packet == PUBLISH:
+                    if (ack := self._publish(flags, body)) is not None:
+                        writer.write(ack)
+                elif packet == SUBSCRIBE:
+                    # Grant QoS 0 for every topic filter
+                    filters, offset = 0, 2
+                    while offset < len(body):
+                        (length,) = struct.unpack(">H", body[offset : offset + 2])
+                        offset += 3 + length
+                        filters += 1
+                    writer.write(bytes((0x90, 2 + filters)) + body[:2] + bytes(filters))
+                elif packet == UNSUBSCRIBE:
+                    writer.write(bytes((0xB0, 2)) + body[:2])
+                elif packet == PINGREQ:
+                    writer.write(bytes((0xD0, 0)))
+                elif packet == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def report(self) -> None:
+        """Print the received telemetry every interval."""
+        start = time.monotonic()
+        while True:
+            await asyncio.sleep(self.args.interval)
+            elapsed = time.monotonic() - start
+            totals = self.totals
+            for charger in sorted(totals.messages):
+                print(
+                    f"{charger}: {totals.messages[charger]} message(s), "
+                    f"{totals.samples[charger]} snapshot(s) "
+                    f"({totals.samples[charger] / elapsed:.2f}/s), "
+                    f"{totals.bytes[charger]} bytes",
+                    flush=True,
+                )
+            if totals.invalid:
+                print(f"invalid payloads: {totals.invalid}", flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topic", default="peblar", help="telemetry topic prefix")
+    parser.add_argument(
+        "--interval", type=float, default=10, help="seconds between reports"
+    )
+    parser.add_argument("--verbose", action="store_true", help="print every batch")
+    return parser
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the sink until interrupted."""
+    sink = Sink(args)
+    server = await asyncio.start_server(sink.session, args.host, args.port)
+    print(f"MQTT sink on {args.host}:{args.port}", flush=True)
+    async with server:
+        await asyncio.gather(server.serve_forever(), sink.report())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(build_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,184 @@
+"""Local stand-in for the Peblar REST API.
+
+Serves /api/wlac/v1/system, /meter and /evinterface (with PATCH support) for
+any number of simulated chargers, each on its own port:
+
+    python scripts/peblar_simulator.py --chargers 10 --latency 40 --jitter 20
+
+Charger N listens on base port + N, so the integration or the benchmark can
+be pointed at 127.0.0.1:8080, 127.0.0.1:8081, ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+API_PREFIX = "/api/wlac/v1/"
+CP_STATES = ("State A", "State B", "State C")
+
+
+class SimulatedCharger:
+    """State of one simulated charger."""
+
+    def __init__(self, index: int, rng: random.Random) -> None:
+        """Initialize the charger with a stable serial number."""
+        self.rng = rng
+        self.system = {
+            "ProductPn": "6004-2300-8002",
+            "ProductSn": f"SIM-{index:05d}",
+            "FirmwareVersion": "1.6.1405+1-SIM",
+            "WlanSignalStrength": -60,
+            "Uptime": 0,
+        }
+        self.evinterface = {
+            "CpState": "State A",
+            "LockState": False,
+            "ChargeCurrentLimit": 16000,
+            "ChargeCurrentLimitSource": "Current limiter",
+            "ChargeCurrentLimitActual": 16000,
+            "Force1Phase": False,
+        }
+        self.energy_total = rng.randint(0, 5_000_000)
+        self.energy_session = 0
+
+    def step(self) -> None:
+        """Advance the simulated charge state by one request."""
+        if self.rng.random() < 0.01:
+            self.evinterface["CpState"] = self.rng.choice(CP_STATES)
+            if self.evinterface["CpState"] == "State A":
+                self.energy_session = 0
+
+    def meter(self) -> dict[str, float | int]:
+        """Return a meter payload for the current state."""
+        charging = self.evinterface["CpState"] == "State C"
+        limit = self.evinterface["ChargeCurrentLimitActual"]
+        meter: dict[str, float | int] = {}
+        power_total = 0
+        for phase in (1, 2, 3):
+            voltage = round(self.rng.gauss(230, 1.5), 1)
+            current = int(limit * self.rng.uniform(0.95, 1.0)) if charging else 0
+            power = int(voltage * current / 1000)
+            meter[f"VoltagePhase{phase}"] = voltage
+            meter[f"CurrentPhase{phase}"] = current
+            meter[f"PowerPhase{phase}"] = power
+            power_total += power
+        self.energy_total += power_total // 360
+        self.energy_session += power_total // 360
+        meter["PowerTotal"] = power_total
+        meter["EnergyTotal"] = self.energy_total
+        meter["EnergySession"] = self.energy_session
+        return meter
+
+
+class Simulator:
+    """Serve the simulated chargers with configurable latency and errors."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Initialize the simulator from the command line arguments."""
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+    async def _delay(self) -> None:
+        """Sleep for the configured latency plus jitter."""
+        delay = self.args.latency + self.rng.uniform(0, self.args.jitter)
+        await asyncio.sleep(delay / 1000)
+
+    def _check(self, request: web.Request) -> None:
+        """Raise the configured errors for a request."""
+        if request.headers.get("Authorization") not in self.args.token:
+            raise web.HTTPUnauthorized
+        if self.rng.random() < self.args.error_rate:
+            raise web.HTTPInternalServerError
+
+    def app(self, charger: SimulatedCharger) -> web.Application:
+        """Return the application serving one charger."""
+
+        async def get_system(request: web.Request) -> web.Response:
+            await self._delay()
+            self._check(request)
+            return web.json_response(charger.system)
+
+        async def get_meter(request: web.Request) -> web.Response:
+            await self._delay()
+            self._check(request)
+            charger.step()
+            return web.json_response(charger.meter())
+
+        async def get_evinterface(request: web.Request) -> web.Response:
+            await self._delay()
+            self._check(request)
+            return web.json_response(charger.evinterface)
+
+        async def patch_evinterface(request: web.Request) -> web.Response:
+            await self._delay()
+            self._check(request)
+            if request.headers.get("Authorization") in self.args.read_only_token:
+                raise web.HTTPForbidden
+            body = json.loads(await request.read())
+            if (limit := body.get("ChargeCurrentLimit")) is not None:
+                charger.evinterface["ChargeCurrentLimit"] = limit
+                charger.evinterface["ChargeCurrentLimitActual"] = limit
+            return web.json_response(charger.evinterface)
+
+        app = web.Application()
+        app.router.add_get(f"{API_PREFIX}system", get_system)
+        app.router.add_get(f"{API_PREFIX}meter", get_meter)
+        app.router.add_get(f"{API_PREFIX}evinterface", get_evinterface)
+        app.router.add_patch(f"{API_PREFIX}evinterface", patch_evinterface)
+        return app
+
+    async def async_start(self) -> list[web.AppRunner]:
+        """Start one server per simulated charger."""
+        runners = []
+        for index in range(self.args.chargers):
+            runner = web.AppRunner(
+                self.app(SimulatedCharger(index, self.rng)), access_log=None
+            )
+            await runner.setup()
+            await web.TCPSite(runner, self.args.host, self.args.port + index).start()
+            runners.append(runner)
+        return runners
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="port of charger 0")
+    parser.add_argument("--chargers", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="milliseconds")
+    parser.add_argument(
+        "--error-rate", type=float, default=0, help="fraction of 500 responses"
+    )
+    parser.add_argument("--token", nargs="+", default=["token", "readonly"])
+    parser.add_argument("--read-only-token", nargs="*", default=["readonly"])
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the simulator until interrupted."""
+    runners = await Simulator(args).async_start()
+    print(
+        f"Simulating {args.chargers} charger(s) on "
+        f"{args.host}:{args.port}-{args.port + args.chargers - 1}",
+        flush=True,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(build_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,189 @@
+"""Replay a captured Peblar trace through the decode and entity path offline.
+
+Reads a trace written with the "Capture raw responses" option and feeds every
+response through PeblarCoordinator._get_data and the sensor and number
+entities of the integration. Home Assistant has to be installed but is not
+started, and no charger is contacted.
+Reports the cost per response of decoding and of deciding and computing
+entity states, and every response that raised, so field problems can be
+reproduced from the trace alone.
+
+    python scripts/replay.py trace-<entry_id>.gz --speed 0 --profile
+
+Requires aiohttp and homeassistant to be installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import json
+from pathlib import Path
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from types import SimpleNamespace
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from custom_components.peblar.peblar import Peblar  # noqa: E402
+from custom_components.peblar.trace import read_trace  # noqa: E402
+
+
+def percentiles_us(samples: list[float]) -> dict[str, float]:
+    """Return p50/p99/max of samples in seconds as microseconds."""
+    if len(samples) < 2:
+        return {}
+    ordered = sorted(samples)
+    quantiles = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {
+        "p50_us": round(quantiles[49] * 1e6, 1),
+        "p99_us": round(quantiles[98] * 1e6, 1),
+        "max_us": round(ordered[-1] * 1e6, 1),
+    }
+
+
+async def replay(args: argparse.Namespace) -> dict[str, Any]:
+    """Replay the trace and return the summary."""
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.peblar.const import CHARGER_SERIAL_NUMBER_KEY
+    from custom_components.peblar.coordinator import PeblarCoordinator
+    from custom_components.peblar.number import NUMBER_TYPES, PeblarNumber
+    from custom_components.peblar.sensor import (
+        DIAGNOSTIC_SENSOR_TYPES,
+        METRIC_SENSOR_TYPES,
+        SENSOR_TYPES,
+        PeblarSensor,
+    )
+
+    records = list(read_trace(args.trace))
+    decode_times: list[float] = []
+    entity_times: list[float] = []
+    writes = 0
+    errors: list[dict[str, Any]] = []
+    entities: list[Any] = []
+    # Keys that entities were looked up for
+    seen: set[str] = set()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entry = SimpleNamespace(entry_id="replay", options={})
+        coordinator = PeblarCoordinator(
+            Peblar("token", "127.0.0.1", None), hass, entry
+        )
+        previous: float | None = None
+        for index, (timestamp, endpoint, body) in enumerate(records):
+            if args.speed and previous is not None:
+                await asyncio.sleep(max(timestamp - previous, 0) / args.speed)
+            previous = timestamp
+            try:
+                start = time.perf_counter()
+                data = coordinator._get_data({endpoint: body})  # noqa: SLF001
+                coordinator.changed_keys = data.diff(coordinator.data)
+                coordinator.data = data
+                decode_times.append(time.perf_counter() - start)
+
+                # Entities need the serial number from the system endpoint.
+                # The endpoints fetched later add their entities as their
+                # keys first show up.
+                if data.get(CHARGER_SERIAL_NUMBER_KEY) is not None:
+                    if not seen:
+                        entities.extend(
+                            PeblarSensor(coordinator, description)
+                            for description in (
+                                *METRIC_SENSOR_TYPES,
+                                *DIAGNOSTIC_SENSOR_TYPES,
+                            )
+                        )
+                    for key in data:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if description := SENSOR_TYPES.get(key):
+                            entities.append(PeblarSensor(coordinator, description))
+                        if description := NUMBER_TYPES.get(key):
+                            entities.append(
+                                PeblarNumber(coordinator, entry, description)
+                            )
+                start = time.perf_counter()
+                for entity in entities:
+                    if entity._should_write():  # noqa: SLF001
+                        entity.native_value  # noqa: B018
+                        writes += 1
+                entity_times.append(time.perf_counter() - start)
+            except Exception as err:  # noqa: BLE001
+                errors.append(
+                    {
+                        "record": index,
+                        "timestamp": timestamp,
+                        "endpoint": endpoint,
+                        "error": repr(err),
+                        "traceback": traceback.format_exc(limit=3),
+                        "body": body[:200].decode(errors="replace"),
+                    }
+                )
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+
+    return {
+        "records": len(records),
+        "entities": len(entities),
+        "state_writes": writes,
+        "decode": percentiles_us(decode_times),
+        "entities_per_response": percentiles_us(entity_times),
+        "errors": errors,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    """Run the replay, optionally under cProfile, and print the results."""
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    result = asyncio.run(replay(args))
+    if profiler is not None:
+        profiler.disable()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key in ("records", "entities", "state_writes"):
+            print(f"{key:>22}: {result[key]}")
+        for key in ("decode", "entities_per_response"):
+            print(f"{key:>22}: {result[key]}")
+        for error in result["errors"]:
+            print(
+                f"record {error['record']} ({error['endpoint']}): {error['error']}\n"
+                f"  body: {error['body']}"
+            )
+    if profiler is not None:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(
+            args.profile_lines
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="trace file written by the integration")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="replay speed relative to the capture, 0 for as fast as possible",
+    )
+    parser.add_argument("--profile", action="store_true", help="run under cProfile")
+    parser.add_argument("--profile-lines", type=int, default=25)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    return parser
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())